@@ -1,4 +1,5 @@
 """Alembic migrations environment."""
+import logging
 import os
 import sys
 from logging.config import fileConfig
@@ -22,6 +23,8 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+logger = logging.getLogger("alembic.env")
+
 # Model metadata for autogenerate
 target_metadata = Base.metadata
 
@@ -29,6 +32,27 @@ target_metadata = Base.metadata
 settings = get_settings()
 config.set_main_option("sqlalchemy.url", settings.database_url)
 
+# Fail fast instead of queueing behind long-running queries. There is no automatic retry:
+# revisions with an autocommit_block() have already committed part of their work, so
+# re-running one is not safe. On lock_not_available (55P03), rerun once traffic allows.
+LOCK_TIMEOUT = "3s"
+
+# Indexes left INVALID by a cancelled CREATE INDEX CONCURRENTLY (lock_timeout also applies
+# while CIC waits out old transactions). relkind 'I' = partitioned parent index.
+INVALID_INDEXES = """
+    SELECT quote_ident(n.nspname) || '.' || quote_ident(c.relname), c.relkind = 'I'
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE NOT i.indisvalid AND n.nspname = current_schema()
+"""
+
+# An index being built (or reindexed) concurrently is also INVALID until it finishes
+INDEX_BUILDS_IN_PROGRESS = """
+    SELECT count(*) FROM pg_stat_progress_create_index
+    WHERE datid = (SELECT oid FROM pg_database WHERE datname = current_database())
+"""
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
@@ -44,6 +68,33 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def drop_invalid_indexes(connection) -> None:
+    """Drop invalid indexes so `CREATE INDEX CONCURRENTLY IF NOT EXISTS` rebuilds them.
+
+    Otherwise the next run would silently keep a broken index, e.g. a unique index that
+    every ON CONFLICT on its columns then fails on. Skipped while any index build is in
+    progress: its index cannot be told apart from a leftover one.
+    """
+    building = connection.exec_driver_sql(INDEX_BUILDS_IN_PROGRESS).scalar()
+    indexes = [] if building else connection.exec_driver_sql(INVALID_INDEXES).all()
+    connection.commit()
+    if building:
+        logger.warning("Index build in progress: invalid indexes left in place")
+    if not indexes:
+        return
+
+    isolation_level = connection.get_isolation_level()
+    connection.execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        for name, partitioned in indexes:
+            # Partitioned (ON ONLY) parents cannot be dropped concurrently
+            concurrently = "" if partitioned else " CONCURRENTLY"
+            connection.exec_driver_sql(f"DROP INDEX{concurrently} IF EXISTS {name}")
+    finally:
+        connection.commit()  # ends the autobegun (no-op) transaction so the level can change
+        connection.execution_options(isolation_level=isolation_level)
+
+
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
     connectable = engine_from_config(
@@ -53,11 +104,17 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        connection.exec_driver_sql(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+        connection.exec_driver_sql("SET statement_timeout = 0")  # long index builds are fine
+        connection.exec_driver_sql("SET idle_in_transaction_session_timeout = '10s'")
+        connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=target_metadata
         )
 
+        drop_invalid_indexes(connection)
         with context.begin_transaction():
             context.run_migrations()
 
@@ -10,6 +10,7 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import HALFVEC
 
 # revision identifiers, used by Alembic.
 revision: str = '001_initial'
@@ -56,17 +57,29 @@ def upgrade() -> None:
         sa.Column('file_path', sa.String(1024), nullable=False),
         sa.Column('file_hash', sa.String(64), nullable=False),
         sa.Column('file_size_bytes', sa.Integer(), nullable=False),
-        sa.Column('status', sa.Enum('queued', 'processing', 'extracted', 'validated', 'failed', name='documentstatus'), nullable=False),
+        sa.Column('status', sa.Enum('queued', 'processing', 'needs_rotation', 'extracted', 'validated', 'failed', name='documentstatus'), nullable=False),
         sa.Column('is_scanned', sa.Boolean(), nullable=True),
         sa.Column('ocr_quality', sa.Float(), nullable=True),
-        sa.Column('doc_type', sa.Enum('po', 'ddt', 'fattura', 'altro', name='documenttype'), nullable=True),
+        sa.Column('doc_type', sa.Enum('po', 'ddt', 'fattura', 'preventivo', 'altro', name='documenttype'), nullable=True),
         sa.Column('doc_type_confidence', sa.Float(), nullable=True),
-        sa.Column('doc_type_override', sa.Enum('po', 'ddt', 'fattura', 'altro', name='documenttype'), nullable=True),
+        sa.Column('doc_type_override', sa.Enum('po', 'ddt', 'fattura', 'preventivo', 'altro', name='documenttype'), nullable=True),
         sa.Column('raw_text', sa.Text(), nullable=True),
         sa.Column('warnings', postgresql.JSON(), nullable=False, server_default='[]'),
         sa.Column('error_message', sa.Text(), nullable=True),
         sa.Column('doc_number', sa.String(100), nullable=True),
         sa.Column('doc_date', sa.DateTime(), nullable=True),
+        sa.Column('fornitore', sa.String(255), nullable=True),
+        sa.Column('emittente', sa.String(255), nullable=True),
+        sa.Column('totale', sa.Float(), nullable=True),
+        sa.Column('vettore', sa.String(255), nullable=True),
+        sa.Column('causale_trasporto', sa.String(100), nullable=True),
+        sa.Column('scadenza_pagamento', sa.DateTime(), nullable=True),
+        sa.Column('modalita_pagamento', sa.String(100), nullable=True),
+        sa.Column('imponibile', sa.Float(), nullable=True),
+        sa.Column('aliquota_iva', sa.Float(), nullable=True),
+        sa.Column('importo_iva', sa.Float(), nullable=True),
+        sa.Column('validita_offerta', sa.DateTime(), nullable=True),
+        sa.Column('data_consegna', sa.DateTime(), nullable=True),
         sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
         sa.Column('updated_at', sa.DateTime(), nullable=True),
         sa.Column('processed_at', sa.DateTime(), nullable=True),
@@ -117,7 +130,7 @@ def upgrade() -> None:
         sa.Column('confidence', sa.Float(), nullable=False, server_default='0'),
         sa.Column('page', sa.Integer(), nullable=True),
         sa.Column('bbox', postgresql.JSON(), nullable=True),
-        sa.Column('embedding', sa.dialects.postgresql.ARRAY(sa.Float), nullable=True),  # Vector stored as array
+        sa.Column('embedding', HALFVEC(768), nullable=True),  # pgvector half precision
         sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
     )
     op.create_index('ix_document_lines_doc', 'document_lines', ['document_id'])
@@ -17,9 +17,33 @@ branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
 
+BATCH_SIZE = 5000
+
+
 def upgrade() -> None:
-    # Add rotation_angle column to document_pages
-    op.add_column('document_pages', sa.Column('rotation_angle', sa.Integer(), nullable=False, server_default='0'))
+    # Expand: add rotation_angle column to document_pages as nullable (no table rewrite)
+    op.add_column('document_pages', sa.Column('rotation_angle', sa.Integer(), nullable=True))
+    op.execute("ALTER TABLE document_pages ALTER COLUMN rotation_angle SET DEFAULT 0")
+
+    # Backfill existing rows in small committed batches
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while True:
+            result = bind.execute(sa.text(
+                "UPDATE document_pages SET rotation_angle = 0 "
+                "WHERE id IN (SELECT id FROM document_pages WHERE rotation_angle IS NULL LIMIT :batch)"
+            ), {"batch": BATCH_SIZE})
+            if result.rowcount == 0:
+                break
+
+    # Contract: a validated CHECK lets SET NOT NULL skip the full-table scan
+    op.execute(
+        "ALTER TABLE document_pages ADD CONSTRAINT ck_document_pages_rotation_not_null "
+        "CHECK (rotation_angle IS NOT NULL) NOT VALID"
+    )
+    op.execute("ALTER TABLE document_pages VALIDATE CONSTRAINT ck_document_pages_rotation_not_null")
+    op.execute("ALTER TABLE document_pages ALTER COLUMN rotation_angle SET NOT NULL")
+    op.execute("ALTER TABLE document_pages DROP CONSTRAINT ck_document_pages_rotation_not_null")
 
 
 def downgrade() -> None:
@@ -46,8 +46,9 @@ def upgrade() -> None:
     )
     
     # Indexes
-    op.create_index(op.f('ix_chat_sessions_user_id'), 'chat_sessions', ['user_id'], unique=False)
-    op.create_index(op.f('ix_chat_messages_session_id'), 'chat_messages', ['session_id'], unique=False)
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chat_sessions_user_id ON chat_sessions (user_id)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chat_messages_session_id ON chat_messages (session_id)")
 
 
 def downgrade() -> None:
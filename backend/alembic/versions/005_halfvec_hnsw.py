@@ -0,0 +1,43 @@
+"""halfvec_embeddings_hnsw_index
+
+Revision ID: 005_halfvec_hnsw
+Revises: 004_chat_history
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005_halfvec_hnsw'
+down_revision: Union[str, None] = '004_chat_history'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Half-precision embeddings: 1.5 KB per row instead of 3 KB
+    op.execute(
+        "ALTER TABLE document_lines "
+        "ALTER COLUMN embedding TYPE halfvec(768) USING embedding::halfvec(768)"
+    )
+
+    # HNSW index for cosine similarity search (built without blocking writes)
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_doclines_embedding_hnsw "
+            "ON document_lines USING hnsw (embedding halfvec_cosine_ops) "
+            "WITH (m = 12, ef_construction = 24)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_doclines_embedding_hnsw")
+
+    op.execute(
+        "ALTER TABLE document_lines "
+        "ALTER COLUMN embedding TYPE vector(768) USING embedding::vector(768)"
+    )
@@ -0,0 +1,46 @@
+"""partial_covering_queue_indexes
+
+Revision ID: 006_queue_indexes
+Revises: 005_halfvec_hnsw
+Create Date: 2026-10-16 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006_queue_indexes'
+down_revision: Union[str, None] = '005_halfvec_hnsw'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Index-only scans for the per-tenant processing queue
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_queue "
+            "ON documents (tenant_id, status, created_at) "
+            "INCLUDE (filename, file_hash) "
+            "WHERE status IN ('queued', 'processing')"
+        )
+        # Failed documents, for retry views
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_failed "
+            "ON documents (tenant_id, created_at) "
+            "INCLUDE (filename, file_hash) "
+            "WHERE status = 'failed'"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_status")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_status "
+            "ON documents (tenant_id, status)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_failed")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_queue")
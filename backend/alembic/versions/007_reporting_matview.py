@@ -0,0 +1,61 @@
+"""reporting_materialized_view
+
+Revision ID: 007_reporting_matview
+Revises: 006_queue_indexes
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007_reporting_matview'
+down_revision: Union[str, None] = '006_queue_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+REPORTING_COLUMNS = """
+    SELECT 
+        d.id AS document_id,
+        d.tenant_id, 
+        d.filename,
+        d.status,
+        d.doc_type AS document_type,
+        d.created_at AS upload_date,
+        d.doc_date AS document_date,
+        d.doc_number AS document_number,
+        d.fornitore AS supplier_name,
+        d.emittente AS issuer_name,
+        d.totale AS total_amount,
+        d.imponibile AS net_amount,
+        d.importo_iva AS tax_amount,
+        'EUR' as currency,
+        extract(year from (COALESCE(d.doc_date, d.created_at))) as doc_year,
+        extract(month from (COALESCE(d.doc_date, d.created_at))) as doc_month
+    FROM documents d
+"""
+
+
+def upgrade() -> None:
+    # 1. Replace the plain view with a materialized one
+    op.execute("DROP VIEW IF EXISTS v_reporting_documents;")
+    op.execute(f"CREATE MATERIALIZED VIEW mv_reporting_documents AS {REPORTING_COLUMNS};")
+
+    # 2. Unique index (required by REFRESH ... CONCURRENTLY) and BI group-by index
+    op.execute("CREATE UNIQUE INDEX ix_mv_reporting_documents_id ON mv_reporting_documents (document_id);")
+    op.execute(
+        "CREATE INDEX ix_mv_reporting_documents_period "
+        "ON mv_reporting_documents (tenant_id, doc_year, doc_month);"
+    )
+
+    # 3. Grant Privileges
+    op.execute("GRANT SELECT ON mv_reporting_documents TO bi_user;")
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_reporting_documents;")
+    op.execute(f"CREATE OR REPLACE VIEW v_reporting_documents AS {REPORTING_COLUMNS};")
+    op.execute("GRANT SELECT ON v_reporting_documents TO bi_user;")
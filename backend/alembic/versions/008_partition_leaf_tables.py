@@ -0,0 +1,85 @@
+"""hash_partition_document_lines_and_chat_messages
+
+Revision ID: 008_partition_leaf_tables
+Revises: 007_reporting_matview
+Create Date: 2026-10-16 10:30:00.000000
+
+Only leaf tables are partitioned: PostgreSQL requires every unique constraint
+on a partitioned table to include the partition key, so `documents` and
+`extracted_fields` (referenced by single-column foreign keys) stay monolithic.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008_partition_leaf_tables'
+down_revision: Union[str, None] = '007_reporting_matview'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARTITIONS = 32
+
+# table -> (partition key, parent FK target, ON DELETE, secondary indexes)
+TABLES = {
+    'document_lines': (
+        'document_id', 'documents(id)', None,
+        [
+            "CREATE INDEX ix_document_lines_doc ON document_lines (document_id)",
+            "CREATE INDEX ix_doclines_embedding_hnsw ON document_lines "
+            "USING hnsw (embedding halfvec_cosine_ops) WITH (m = 12, ef_construction = 24)",
+        ],
+    ),
+    'chat_messages': (
+        'session_id', 'chat_sessions(id)', 'CASCADE',
+        [
+            "CREATE INDEX ix_chat_messages_session_id ON chat_messages (session_id)",
+        ],
+    ),
+}
+
+
+def _rebuild(table: str, partitioned: bool) -> None:
+    """Copy `table` into a (non-)partitioned twin and swap it in place."""
+    key, target, ondelete, indexes = TABLES[table]
+    new = f"{table}_new"
+
+    partition_clause = f" PARTITION BY HASH ({key})" if partitioned else ""
+    op.execute(
+        f"CREATE TABLE {new} (LIKE {table} INCLUDING DEFAULTS INCLUDING STORAGE)"
+        f"{partition_clause}"
+    )
+    if partitioned:
+        for i in range(PARTITIONS):
+            op.execute(
+                f"CREATE TABLE {table}_p{i:02d} PARTITION OF {new} "
+                f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {i})"
+            )
+
+    op.execute(f"INSERT INTO {new} SELECT * FROM {table}")
+    op.execute(f"DROP TABLE {table}")
+    op.execute(f"ALTER TABLE {new} RENAME TO {table}")
+
+    # Partitioned primary keys must include the partition key
+    pk_columns = f"id, {key}" if partitioned else "id"
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({pk_columns})")
+    on_delete = f" ON DELETE {ondelete}" if ondelete else ""
+    op.execute(
+        f"ALTER TABLE {table} ADD CONSTRAINT {table}_{key}_fkey "
+        f"FOREIGN KEY ({key}) REFERENCES {target}{on_delete}"
+    )
+    for statement in indexes:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        _rebuild(table, partitioned=True)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        _rebuild(table, partitioned=False)
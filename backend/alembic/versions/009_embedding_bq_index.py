@@ -0,0 +1,34 @@
+"""binary_quantized_embedding_index
+
+Revision ID: 009_embedding_bq_index
+Revises: 008_partition_leaf_tables
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009_embedding_bq_index'
+down_revision: Union[str, None] = '008_partition_leaf_tables'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # More memory for the HNSW graph build keeps it out of on-disk sorting
+    op.execute("SET LOCAL maintenance_work_mem = '1GB'")
+
+    # Coarse 96-byte binary codes, reranked against the halfvec column at query time.
+    # document_lines is partitioned, so CONCURRENTLY is not available here.
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_doclines_embedding_bq ON document_lines "
+        "USING hnsw ((binary_quantize(embedding)::bit(768)) bit_hamming_ops) "
+        "WITH (m = 12, ef_construction = 24)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_doclines_embedding_bq")
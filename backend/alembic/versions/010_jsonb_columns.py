@@ -0,0 +1,49 @@
+"""json_columns_to_jsonb
+
+Revision ID: 010_jsonb_columns
+Revises: 009_embedding_bq_index
+Create Date: 2026-10-16 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010_jsonb_columns'
+down_revision: Union[str, None] = '009_embedding_bq_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = [
+    ('documents', 'warnings'),
+    ('extracted_fields', 'bbox'),
+    ('document_lines', 'bbox'),
+    ('tenants', 'config'),
+]
+
+
+def upgrade() -> None:
+    for table, column in COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb")
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_warnings_gin "
+            "ON documents USING gin (warnings jsonb_path_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tenants_config_gin "
+            "ON tenants USING gin (config jsonb_path_ops)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tenants_config_gin")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_warnings_gin")
+
+    for table, column in COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE json USING {column}::json")
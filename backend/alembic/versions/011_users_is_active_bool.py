@@ -0,0 +1,31 @@
+"""users_is_active_boolean
+
+Revision ID: 011_users_is_active_bool
+Revises: 010_jsonb_columns
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011_users_is_active_bool'
+down_revision: Union[str, None] = '010_jsonb_columns'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE users ADD COLUMN is_active_bool BOOLEAN NOT NULL DEFAULT TRUE")
+    op.execute("UPDATE users SET is_active_bool = (is_active = 'Y')")
+    op.execute("ALTER TABLE users DROP COLUMN is_active")
+    op.execute("ALTER TABLE users RENAME COLUMN is_active_bool TO is_active")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE users ADD COLUMN is_active_str VARCHAR(1) NOT NULL DEFAULT 'Y'")
+    op.execute("UPDATE users SET is_active_str = CASE WHEN is_active THEN 'Y' ELSE 'N' END")
+    op.execute("ALTER TABLE users DROP COLUMN is_active")
+    op.execute("ALTER TABLE users RENAME COLUMN is_active_str TO is_active")
@@ -0,0 +1,47 @@
+"""chat_messages_keyset_index
+
+Revision ID: 012_chat_messages_keyset
+Revises: 011_users_is_active_bool
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012_chat_messages_keyset'
+down_revision: Union[str, None] = '011_users_is_active_bool'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARTITIONS = 32
+
+
+def upgrade() -> None:
+    # chat_messages is partitioned: build the parent index empty (ON ONLY),
+    # then build each partition's index concurrently and attach it
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_chat_messages_session_ts "
+        "ON ONLY chat_messages (session_id, created_at, id)"
+    )
+    with op.get_context().autocommit_block():
+        for i in range(PARTITIONS):
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chat_messages_p{i:02d}_session_ts "
+                f"ON chat_messages_p{i:02d} (session_id, created_at, id)"
+            )
+            op.execute(
+                f"ALTER INDEX ix_chat_messages_session_ts "
+                f"ATTACH PARTITION ix_chat_messages_p{i:02d}_session_ts"
+            )
+
+    # Superseded by the composite index (same leading column)
+    op.execute("DROP INDEX IF EXISTS ix_chat_messages_session_id")
+
+
+def downgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_chat_messages_session_id ON chat_messages (session_id)")
+    op.execute("DROP INDEX IF EXISTS ix_chat_messages_session_ts")
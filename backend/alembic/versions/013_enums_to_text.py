@@ -0,0 +1,106 @@
+"""enum_columns_to_checked_text
+
+Revision ID: 013_enums_to_text
+Revises: 012_chat_messages_keyset
+Create Date: 2026-10-16 13:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '013_enums_to_text'
+down_revision: Union[str, None] = '012_chat_messages_keyset'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DOCUMENT_STATUSES = ('queued', 'processing', 'needs_rotation', 'extracted', 'validated', 'failed')
+DOCUMENT_TYPES = ('po', 'ddt', 'fattura', 'preventivo', 'altro')
+
+# (table, column, constraint, allowed values)
+CHECKS = [
+    ('documents', 'status', 'chk_documents_status', DOCUMENT_STATUSES),
+    ('documents', 'doc_type', 'chk_documents_doc_type', DOCUMENT_TYPES),
+    ('documents', 'doc_type_override', 'chk_documents_doc_type_override', DOCUMENT_TYPES),
+    ('users', 'role', 'chk_users_role', ('admin', 'operatore', 'manager')),
+    ('field_events', 'event_type', 'chk_field_events_event_type', ('created', 'updated', 'validated')),
+]
+
+# Partial indexes from 006 whose predicates compare status to enum literals: they would
+# fail to rebuild (text = documentstatus) during the type change
+STATUS_PARTIAL_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_documents_queue "
+    "ON documents (tenant_id, status, created_at) "
+    "INCLUDE (filename, file_hash) "
+    "WHERE status IN ('queued', 'processing')",
+    "CREATE INDEX IF NOT EXISTS ix_documents_failed "
+    "ON documents (tenant_id, created_at) "
+    "INCLUDE (filename, file_hash) "
+    "WHERE status = 'failed'",
+]
+
+REPORTING_COLUMNS = """
+    SELECT 
+        d.id AS document_id,
+        d.tenant_id, 
+        d.filename,
+        d.status,
+        d.doc_type AS document_type,
+        d.created_at AS upload_date,
+        d.doc_date AS document_date,
+        d.doc_number AS document_number,
+        d.fornitore AS supplier_name,
+        d.emittente AS issuer_name,
+        d.totale AS total_amount,
+        d.imponibile AS net_amount,
+        d.importo_iva AS tax_amount,
+        'EUR' as currency,
+        extract(year from (COALESCE(d.doc_date, d.created_at))) as doc_year,
+        extract(month from (COALESCE(d.doc_date, d.created_at))) as doc_month
+    FROM documents d
+"""
+
+
+def upgrade() -> None:
+    # The reporting view depends on documents.status/doc_type
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_reporting_documents;")
+    op.execute("DROP INDEX IF EXISTS ix_documents_queue")
+    op.execute("DROP INDEX IF EXISTS ix_documents_failed")
+
+    for table, column, _, _ in CHECKS:
+        # lower(): event types were stored by enum name when created via create_all
+        using = f"lower({column}::text)" if column == 'event_type' else f"{column}::text"
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE text USING {using}")
+
+    # Rebuilt with text predicates; the table is rewritten under this lock anyway
+    for create_index in STATUS_PARTIAL_INDEXES:
+        op.execute(create_index)
+
+    for enum_type in ('documentstatus', 'documenttype', 'userrole', 'fieldeventtype'):
+        op.execute(f"DROP TYPE IF EXISTS {enum_type}")
+
+    # NOT VALID + VALIDATE: only a SHARE UPDATE EXCLUSIVE lock while scanning
+    for table, column, constraint, values in CHECKS:
+        allowed = ", ".join(f"'{v}'" for v in values)
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {constraint} "
+            f"CHECK ({column} IN ({allowed})) NOT VALID"
+        )
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}")
+
+    op.execute(f"CREATE MATERIALIZED VIEW mv_reporting_documents AS {REPORTING_COLUMNS};")
+    op.execute("CREATE UNIQUE INDEX ix_mv_reporting_documents_id ON mv_reporting_documents (document_id);")
+    op.execute(
+        "CREATE INDEX ix_mv_reporting_documents_period "
+        "ON mv_reporting_documents (tenant_id, doc_year, doc_month);"
+    )
+    op.execute("GRANT SELECT ON mv_reporting_documents TO bi_user;")
+
+
+def downgrade() -> None:
+    # Columns stay TEXT: new values may already be stored
+    for table, _, constraint, _ in CHECKS:
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}")
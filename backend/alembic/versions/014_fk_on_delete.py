@@ -0,0 +1,70 @@
+"""field_events_user_index_and_fk_on_delete
+
+Revision ID: 014_fk_on_delete
+Revises: 013_enums_to_text
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '014_fk_on_delete'
+down_revision: Union[str, None] = '013_enums_to_text'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _replace_fk(table: str, column: str, target: str, ondelete: str | None, validate: bool = True) -> None:
+    """Recreate `<table>_<column>_fkey` with a new ON DELETE action.
+
+    The new constraint is added NOT VALID under a temporary name, validated in its own
+    transaction (SHARE UPDATE EXCLUSIVE: reads and writes continue during the scan),
+    then swapped in for the old one.
+    """
+    constraint = f"{table}_{column}_fkey"
+    temp = f"{constraint}_new"
+    on_delete = f" ON DELETE {ondelete}" if ondelete else ""
+    # NOT VALID is not supported on partitioned tables
+    not_valid = " NOT VALID" if validate else ""
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {temp}")
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {temp} "
+            f"FOREIGN KEY ({column}) REFERENCES {target}{on_delete}{not_valid}"
+        )
+        if validate:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {temp}")
+        # One implicit transaction: the column is never left without a foreign key
+        op.execute(
+            f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}; "
+            f"ALTER TABLE {table} RENAME CONSTRAINT {temp} TO {constraint}"
+        )
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_field_events_user "
+            "ON field_events (user_id, created_at DESC)"
+        )
+
+    # Audit rows outlive the user who made them
+    op.execute("ALTER TABLE field_events ALTER COLUMN user_id DROP NOT NULL")
+    _replace_fk('field_events', 'user_id', 'users(id)', 'SET NULL')
+
+    # Extraction results go away with their document
+    _replace_fk('extracted_fields', 'document_id', 'documents(id)', 'CASCADE')
+    _replace_fk('document_lines', 'document_id', 'documents(id)', 'CASCADE', validate=False)
+
+
+def downgrade() -> None:
+    _replace_fk('document_lines', 'document_id', 'documents(id)', None, validate=False)
+    _replace_fk('extracted_fields', 'document_id', 'documents(id)', None)
+    _replace_fk('field_events', 'user_id', 'users(id)', None)
+    op.execute("ALTER TABLE field_events ALTER COLUMN user_id SET NOT NULL")
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_field_events_user")
@@ -0,0 +1,39 @@
+"""uuid_server_defaults
+
+Revision ID: 015_uuid_server_defaults
+Revises: 014_fk_on_delete
+Create Date: 2026-10-16 14:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '015_uuid_server_defaults'
+down_revision: Union[str, None] = '014_fk_on_delete'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# chat_sessions / chat_messages already default to gen_random_uuid() (004)
+TABLES = [
+    'tenants',
+    'users',
+    'documents',
+    'document_pages',
+    'extracted_fields',
+    'document_lines',
+    'field_events',
+]
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT gen_random_uuid()")
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT")
@@ -0,0 +1,37 @@
+"""raw_text_full_text_search
+
+Revision ID: 016_raw_text_fts
+Revises: 015_uuid_server_defaults
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '016_raw_text_fts'
+down_revision: Union[str, None] = '015_uuid_server_defaults'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE documents ADD COLUMN IF NOT EXISTS raw_text_tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('italian', coalesce(raw_text, ''))) STORED"
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_raw_text_tsv "
+            "ON documents USING gin (raw_text_tsv)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_raw_text_tsv")
+
+    op.execute("ALTER TABLE documents DROP COLUMN IF EXISTS raw_text_tsv")
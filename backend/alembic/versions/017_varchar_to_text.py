@@ -0,0 +1,79 @@
+"""varchar_columns_to_text
+
+Revision ID: 017_varchar_to_text
+Revises: 016_raw_text_fts
+Create Date: 2026-10-16 15:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '017_varchar_to_text'
+down_revision: Union[str, None] = '016_raw_text_fts'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column, previous varchar length)
+COLUMNS = [
+    ('documents', 'filename', 512),
+    ('documents', 'file_path', 1024),
+    ('users', 'hashed_password', 255),
+    ('users', 'full_name', 255),
+    ('tenants', 'name', 255),
+    ('chat_sessions', 'title', 255),
+]
+
+REPORTING_COLUMNS = """
+    SELECT 
+        d.id AS document_id,
+        d.tenant_id, 
+        d.filename,
+        d.status,
+        d.doc_type AS document_type,
+        d.created_at AS upload_date,
+        d.doc_date AS document_date,
+        d.doc_number AS document_number,
+        d.fornitore AS supplier_name,
+        d.emittente AS issuer_name,
+        d.totale AS total_amount,
+        d.imponibile AS net_amount,
+        d.importo_iva AS tax_amount,
+        'EUR' as currency,
+        extract(year from (COALESCE(d.doc_date, d.created_at))) as doc_year,
+        extract(month from (COALESCE(d.doc_date, d.created_at))) as doc_month
+    FROM documents d
+"""
+
+
+def _recreate_reporting_view() -> None:
+    op.execute(f"CREATE MATERIALIZED VIEW mv_reporting_documents AS {REPORTING_COLUMNS};")
+    op.execute("CREATE UNIQUE INDEX ix_mv_reporting_documents_id ON mv_reporting_documents (document_id);")
+    op.execute(
+        "CREATE INDEX ix_mv_reporting_documents_period "
+        "ON mv_reporting_documents (tenant_id, doc_year, doc_month);"
+    )
+    op.execute("GRANT SELECT ON mv_reporting_documents TO bi_user;")
+
+
+def upgrade() -> None:
+    # The reporting view depends on documents.filename
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_reporting_documents;")
+
+    # varchar -> text is binary coercible: catalog-only change, no table rewrite
+    for table, column, _ in COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE text")
+
+    _recreate_reporting_view()
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_reporting_documents;")
+
+    for table, column, length in COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE varchar({length})")
+
+    _recreate_reporting_view()
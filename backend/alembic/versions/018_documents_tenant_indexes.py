@@ -0,0 +1,43 @@
+"""documents_tenant_indexes
+
+Revision ID: 018_documents_tenant_indexes
+Revises: 017_varchar_to_text
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '018_documents_tenant_indexes'
+down_revision: Union[str, None] = '017_varchar_to_text'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Recent documents / period counts: ORDER BY created_at DESC LIMIT n per tenant
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_tenant_created "
+            "ON documents (tenant_id, created_at DESC)"
+        )
+        # Status breakdowns across all statuses (the partial indexes only cover queue/failed)
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_tenant_status "
+            "ON documents (tenant_id, status)"
+        )
+        # Leading-column prefix of ix_documents_tenant_created
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_tenant")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_tenant "
+            "ON documents (tenant_id)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_tenant_status")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_tenant_created")
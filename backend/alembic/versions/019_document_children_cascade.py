@@ -0,0 +1,55 @@
+"""document_children_cascade
+
+Revision ID: 019_document_children_cascade
+Revises: 018_documents_tenant_indexes
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '019_document_children_cascade'
+down_revision: Union[str, None] = '018_documents_tenant_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _replace_fk(table: str, column: str, target: str, ondelete: str | None, validate: bool = True) -> None:
+    """Recreate `<table>_<column>_fkey` with a new ON DELETE action.
+
+    The new constraint is added NOT VALID under a temporary name, validated in its own
+    transaction (SHARE UPDATE EXCLUSIVE: reads and writes continue during the scan),
+    then swapped in for the old one.
+    """
+    constraint = f"{table}_{column}_fkey"
+    temp = f"{constraint}_new"
+    on_delete = f" ON DELETE {ondelete}" if ondelete else ""
+    # NOT VALID is not supported on partitioned tables
+    not_valid = " NOT VALID" if validate else ""
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {temp}")
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {temp} "
+            f"FOREIGN KEY ({column}) REFERENCES {target}{on_delete}{not_valid}"
+        )
+        if validate:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {temp}")
+        # One implicit transaction: the column is never left without a foreign key
+        op.execute(
+            f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}; "
+            f"ALTER TABLE {table} RENAME CONSTRAINT {temp} TO {constraint}"
+        )
+
+
+def upgrade() -> None:
+    # Deleting a document removes pages and field history server-side
+    _replace_fk('document_pages', 'document_id', 'documents(id)', 'CASCADE')
+    _replace_fk('field_events', 'field_id', 'extracted_fields(id)', 'CASCADE')
+
+
+def downgrade() -> None:
+    _replace_fk('field_events', 'field_id', 'extracted_fields(id)', None)
+    _replace_fk('document_pages', 'document_id', 'documents(id)', None)
@@ -0,0 +1,38 @@
+"""document_page_count
+
+Revision ID: 020_document_page_count
+Revises: 019_document_children_cascade
+Create Date: 2026-10-16 17:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '020_document_page_count'
+down_revision: Union[str, None] = '019_document_children_cascade'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('page_count', sa.Integer(), nullable=True))
+
+    # Backfill from the page rows saved at ingest; the rest is filled lazily
+    op.execute("""
+        UPDATE documents d
+        SET page_count = p.n
+        FROM (
+            SELECT document_id, count(*) AS n
+            FROM document_pages
+            GROUP BY document_id
+        ) p
+        WHERE p.document_id = d.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('documents', 'page_count')
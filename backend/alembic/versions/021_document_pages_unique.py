@@ -0,0 +1,53 @@
+"""document_pages_unique
+
+Revision ID: 021_document_pages_unique
+Revises: 020_document_page_count
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '021_document_pages_unique'
+down_revision: Union[str, None] = '020_document_page_count'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Duplicates left by the old SELECT-then-INSERT rotation path. document_pages has no
+    # timestamp and ids are random UUIDs, so there is no "newest" row: keep one that has
+    # text, breaking ties by id (arbitrary but deterministic).
+    op.execute("""
+        DELETE FROM document_pages
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY document_id, page_number
+                    ORDER BY (text_content IS NOT NULL) DESC, id DESC
+                ) AS rn
+                FROM document_pages
+            ) ranked
+            WHERE rn > 1
+        )
+    """)
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_document_pages_doc_page "
+            "ON document_pages (document_id, page_number)"
+        )
+        # Leading-column prefix of ux_document_pages_doc_page
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_document_pages_doc")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_document_pages_doc "
+            "ON document_pages (document_id)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ux_document_pages_doc_page")
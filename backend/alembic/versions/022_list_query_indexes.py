@@ -0,0 +1,66 @@
+"""list_query_indexes
+
+Revision ID: 022_list_query_indexes
+Revises: 021_document_pages_unique
+Create Date: 2026-10-16 18:30:00.000000
+
+Composite indexes matching the list endpoints' filter + ORDER BY. The remaining
+per-document lookups are already covered: extracted_fields (ix_extracted_fields_doc),
+field_events (ix_field_events_field), document_pages (ux_document_pages_doc_page).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '022_list_query_indexes'
+down_revision: Union[str, None] = '021_document_pages_unique'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARTITIONS = 32
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # list_documents?status=...: ORDER BY created_at DESC without a sort
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_tenant_status_created "
+            "ON documents (tenant_id, status, created_at DESC)"
+        )
+        # Leading-column prefix of the new index
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_tenant_status")
+
+    # document_lines is partitioned: parent index ON ONLY, partitions concurrently, then attach
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_document_lines_doc_line "
+        "ON ONLY document_lines (document_id, line_number)"
+    )
+    with op.get_context().autocommit_block():
+        for i in range(PARTITIONS):
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_document_lines_p{i:02d}_doc_line "
+                f"ON document_lines_p{i:02d} (document_id, line_number)"
+            )
+            op.execute(
+                f"ALTER INDEX ix_document_lines_doc_line "
+                f"ATTACH PARTITION ix_document_lines_p{i:02d}_doc_line"
+            )
+
+    # Superseded by the composite index (same leading column)
+    op.execute("DROP INDEX IF EXISTS ix_document_lines_doc")
+
+
+def downgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_document_lines_doc ON document_lines (document_id)")
+    op.execute("DROP INDEX IF EXISTS ix_document_lines_doc_line")
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_tenant_status "
+            "ON documents (tenant_id, status)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_tenant_status_created")
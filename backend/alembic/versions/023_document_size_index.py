@@ -0,0 +1,33 @@
+"""document_size_index
+
+Revision ID: 023_document_size_index
+Revises: 022_list_query_indexes
+Create Date: 2026-10-16 19:10:00.000000
+
+Folder ingestion only hashes files whose size already exists for the tenant;
+the size lookup is served by (tenant_id, file_size_bytes).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '023_document_size_index'
+down_revision: Union[str, None] = '022_list_query_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_tenant_size "
+            "ON documents (tenant_id, file_size_bytes)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_tenant_size")
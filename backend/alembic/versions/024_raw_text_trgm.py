@@ -0,0 +1,37 @@
+"""raw_text_trgm
+
+Revision ID: 024_raw_text_trgm
+Revises: 023_document_size_index
+Create Date: 2026-10-17 10:00:00.000000
+
+RAG candidates include documents whose raw_text contains a search term as a
+literal substring (partial article codes, names inside longer tokens), which
+the stemmed raw_text_tsv match misses: trigram GIN on lower(raw_text).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '024_raw_text_trgm'
+down_revision: Union[str, None] = '023_document_size_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_raw_text_trgm "
+            "ON documents USING gin (lower(raw_text) gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    # The extension stays: dropping it would take other users' objects with it
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documents_raw_text_trgm")
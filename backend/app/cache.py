@@ -0,0 +1,129 @@
+"""Redis cache client shared by the API routers."""
+import logging
+
+from redis import asyncio as aioredis
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Errors that should degrade to the database path instead of failing the request
+CACHE_ERRORS = (aioredis.RedisError, OSError)
+
+_redis: aioredis.Redis | None = None
+_redis_bytes: aioredis.Redis | None = None
+
+
+def get_redis() -> aioredis.Redis:
+    """Lazily created async Redis client (pooled, short timeouts)."""
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(
+            settings.redis_url,
+            decode_responses=True,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5,
+        )
+    return _redis
+
+
+def get_redis_bytes() -> aioredis.Redis:
+    """Same as get_redis() but returns raw bytes (binary payloads such as images)."""
+    global _redis_bytes
+    if _redis_bytes is None:
+        _redis_bytes = aioredis.from_url(
+            settings.redis_url,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5,
+        )
+    return _redis_bytes
+
+
+# ============ Dashboard ============
+
+DASHBOARD_TTL_SECONDS = 30
+
+
+def _dashboard_key(tenant_id) -> str:
+    return f"dash:{tenant_id}"
+
+
+async def get_cached_dashboard(tenant_id, days: int) -> str | None:
+    """Serialized dashboard payload for (tenant, days), if cached."""
+    try:
+        return await get_redis().hget(_dashboard_key(tenant_id), str(days))
+    except CACHE_ERRORS as e:
+        logger.warning(f"Dashboard cache unavailable: {e}")
+        return None
+
+
+async def set_cached_dashboard(tenant_id, days: int, payload: str) -> None:
+    """Store a serialized dashboard payload; the whole tenant hash expires together."""
+    key = _dashboard_key(tenant_id)
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.hset(key, str(days), payload)
+            pipe.expire(key, DASHBOARD_TTL_SECONDS, nx=True)
+            await pipe.execute()
+    except CACHE_ERRORS as e:
+        logger.warning(f"Dashboard cache unavailable: {e}")
+
+
+async def invalidate_dashboard(tenant_id) -> None:
+    """Drop every cached dashboard variant of a tenant (new or changed documents)."""
+    try:
+        await get_redis().delete(_dashboard_key(tenant_id))
+    except CACHE_ERRORS as e:
+        logger.warning(f"Dashboard cache unavailable: {e}")
+
+
+# ============ Page previews ============
+
+PREVIEW_TTL_SECONDS = 3600
+
+
+def preview_key(document_id, page_num: int, rotation: int, dpi: int) -> str:
+    # Rotation is part of the key, so changing it never serves a stale image
+    return f"pagepreview:{document_id}:{page_num}:{rotation}:{dpi}"
+
+
+async def get_cached_preview(key: str) -> bytes | None:
+    """Rendered JPEG for a preview key, if cached."""
+    try:
+        return await get_redis_bytes().get(key)
+    except CACHE_ERRORS as e:
+        logger.warning(f"Preview cache unavailable: {e}")
+        return None
+
+
+async def set_cached_preview(key: str, image: bytes) -> None:
+    try:
+        await get_redis_bytes().set(key, image, ex=PREVIEW_TTL_SECONDS)
+    except CACHE_ERRORS as e:
+        logger.warning(f"Preview cache unavailable: {e}")
+
+
+# ============ Ingestion jobs ============
+
+JOB_TTL_SECONDS = 3600
+
+
+def _job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+async def get_cached_job(job_id: str) -> str | None:
+    """Serialized JobStatus, visible to every API worker until it expires."""
+    try:
+        return await get_redis().get(_job_key(job_id))
+    except CACHE_ERRORS as e:
+        logger.warning(f"Job store unavailable: {e}")
+        return None
+
+
+async def set_cached_job(job_id: str, payload: str) -> None:
+    try:
+        await get_redis().set(_job_key(job_id), payload, ex=JOB_TTL_SECONDS)
+    except CACHE_ERRORS as e:
+        logger.warning(f"Job store unavailable: {e}")
@@ -1,28 +1,94 @@
 """Database setup with SQLAlchemy and pgvector."""
-from sqlalchemy import create_engine
+from pathlib import Path
+from uuid import uuid4
+
+from alembic.config import Config as AlembicConfig
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from pgvector.sqlalchemy import Vector
 
 from app.config import get_settings
 
 
 settings = get_settings()
 
+# Sync engine: Celery workers, scripts and services that run in threads
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
     pool_size=10,
     max_overflow=20,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: FastAPI request handlers (asyncpg)
+if settings.database_pooler_url:
+    # PgBouncer in transaction mode: server connections are shared between
+    # clients, so prepared statements must not be cached or reused by name
+    # update_query_dict keeps any sslmode/options already in the URL
+    _async_url = make_url(settings.database_pooler_url).set(
+        drivername="postgresql+asyncpg",
+    ).update_query_dict({"prepared_statement_cache_size": "0"})
+    _connect_args = {
+        "statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+else:
+    _async_url = make_url(settings.database_url).set(
+        drivername="postgresql+asyncpg",
+    ).update_query_dict({"prepared_statement_cache_size": "1024"})
+    _connect_args = {"statement_cache_size": 1024}
+
+async_engine = create_async_engine(
+    _async_url,
+    pool_pre_ping=not settings.database_pooler_url,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    connect_args={
+        **_connect_args,
+        "server_settings": {"application_name": "docintelrag"},
+    },
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 class Base(DeclarativeBase):
     """Base class for all database models."""
     pass
 
 
+class BulkInsertMixin:
+    """Batched Core INSERTs for high-volume child rows."""
+    
+    @classmethod
+    def bulk_insert(cls, session, rows, batch_size: int = 1000) -> None:
+        """Insert row dicts (all with the same keys) in batches, bypassing the unit of work."""
+        rows = list(rows)
+        for start in range(0, len(rows), batch_size):
+            session.execute(insert(cls), rows[start:start + batch_size])
+    
+    @classmethod
+    def bulk_upsert(cls, session, rows, index_elements, update_columns, batch_size: int = 1000) -> None:
+        """Like bulk_insert, updating `update_columns` of rows that hit the unique `index_elements`."""
+        rows = list(rows)
+        stmt = pg_insert(cls)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={col: stmt.excluded[col] for col in update_columns},
+        )
+        for start in range(0, len(rows), batch_size):
+            session.execute(stmt, rows[start:start + batch_size])
+
+
 def get_db():
     """Dependency for database session."""
     db = SessionLocal()
@@ -32,10 +98,25 @@ def get_db():
         db.close()
 
 
-def init_db():
-    """Initialize database with pgvector extension."""
-    from sqlalchemy import text
-    with engine.connect() as conn:
-        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
-        conn.commit()
-    Base.metadata.create_all(bind=engine)
+async def get_async_db():
+    """Dependency for async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def check_schema_version():
+    """Refuse to start unless the database is migrated to the Alembic head."""
+    alembic_cfg = AlembicConfig()
+    alembic_cfg.set_main_option("script_location", str(Path(__file__).resolve().parents[1] / "alembic"))
+    head = ScriptDirectory.from_config(alembic_cfg).get_current_head()
+    
+    try:
+        async with async_engine.connect() as conn:
+            current = await conn.scalar(text("SELECT version_num FROM alembic_version"))
+    except Exception as e:
+        raise RuntimeError(f"Database schema is not initialized, run 'alembic upgrade head' ({e})")
+    
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}: run 'alembic upgrade head'"
+        )
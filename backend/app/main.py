@@ -3,9 +3,12 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from app.config import get_settings
-from app.database import init_db
+from app.database import check_schema_version
+from app.middleware import AuthGateMiddleware
+from app.responses import ORJSONResponse
 from app.routers import (
     health_router,
     auth_router,
@@ -18,12 +21,14 @@ from app.routers import (
 
 settings = get_settings()
 
+API_PREFIX = "/api/v1"
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     # Startup
-    init_db()
+    await check_schema_version()
     yield
     # Shutdown
 
@@ -33,26 +38,39 @@ app = FastAPI(
     description="Document Intelligence with RAG and Human-in-the-Loop",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+# Auth gate: added first so CORS (added last) stays outermost and decorates 401s
+app.add_middleware(
+    AuthGateMiddleware,
+    public_paths={"/", "/docs", "/docs/oauth2-redirect", "/openapi.json", "/redoc", f"{API_PREFIX}/auth/token"},
+    public_prefixes=(f"{API_PREFIX}/health",),
+    query_token_suffixes=("/pdf",),  # iframe viewer: validated by the route itself
+)
+
+# Compression (RAG answers with citations are large JSON)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure properly in production
+    allow_origins=settings.cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+    allow_headers=["Authorization", "Content-Type"],
+    expose_headers=["X-Next-Cursor"],
+    max_age=600,
 )
 
 # Mount routers under /api/v1
-API_PREFIX = "/api/v1"
-
-app.include_router(health_router, prefix=API_PREFIX)
-app.include_router(auth_router, prefix=API_PREFIX)
+# Busiest routers first: routes are matched in registration order
 app.include_router(documents_router, prefix=API_PREFIX)
-app.include_router(ingestion_router, prefix=API_PREFIX)
 app.include_router(chat_router, prefix=API_PREFIX)
 app.include_router(dashboard_router, prefix=API_PREFIX)
+app.include_router(health_router, prefix=API_PREFIX)
+app.include_router(auth_router, prefix=API_PREFIX)
+app.include_router(ingestion_router, prefix=API_PREFIX)
 app.include_router(admin_router, prefix=API_PREFIX)
 
 
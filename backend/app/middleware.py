@@ -0,0 +1,66 @@
+"""ASGI middleware."""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.responses import ORJSONResponse
+from app.routers.auth import decode_access_token, get_cached_user
+
+
+class AuthGateMiddleware:
+    """Reject requests without a valid bearer token before routing and dependency resolution.
+    
+    Verified claims are stored in request.state.token_claims so get_current_user
+    does not decode the token a second time.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        public_paths: set[str] = frozenset(),
+        public_prefixes: tuple[str, ...] = (),
+        query_token_suffixes: tuple[str, ...] = (),
+    ):
+        self.app = app
+        self.public_paths = frozenset(public_paths)
+        self.public_prefixes = public_prefixes
+        self.query_token_suffixes = query_token_suffixes  # Routes that authenticate via ?token=
+    
+    def _is_public(self, scope: Scope) -> bool:
+        path = scope["path"]
+        return (
+            path in self.public_paths
+            or path.startswith(self.public_prefixes)
+            or (path.endswith(self.query_token_suffixes) and b"token=" in scope.get("query_string", b""))
+        )
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or self._is_public(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        token = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, credentials = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and credentials:
+                    token = credentials
+                break
+        
+        if token is None:
+            await self._reject("Not authenticated", scope, receive, send)
+            return
+        
+        if get_cached_user(token) is None:
+            claims = decode_access_token(token)
+            if claims is None:
+                await self._reject("Could not validate credentials", scope, receive, send)
+                return
+            scope.setdefault("state", {})["token_claims"] = claims
+        
+        await self.app(scope, receive, send)
+    
+    @staticmethod
+    async def _reject(detail: str, scope: Scope, receive: Receive, send: Send) -> None:
+        response = ORJSONResponse(
+            {"detail": detail}, status_code=401, headers={"WWW-Authenticate": "Bearer"}
+        )
+        await response(scope, receive, send)
@@ -1,7 +1,7 @@
 """Chat history database models."""
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
@@ -13,11 +13,12 @@ class ChatSession(Base):
     
     __tablename__ = "chat_sessions"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Client-side default so the id is known before flush
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
     
-    title = Column(String(255), nullable=True)
+    title = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -33,9 +34,14 @@ class ChatMessage(Base):
     """Individual message in a chat session."""
     
     __tablename__ = "chat_messages"
-    
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    session_id = Column(UUID(as_uuid=True), ForeignKey("chat_sessions.id"), nullable=False)
+    __table_args__ = (
+        Index("ix_chat_messages_session_ts", "session_id", "created_at", "id"),
+        {"postgresql_partition_by": "HASH (session_id)"},
+    )
+    
+    # The partition key is part of the primary key (PostgreSQL requirement)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    session_id = Column(UUID(as_uuid=True), ForeignKey("chat_sessions.id"), primary_key=True)
     
     role = Column(String(50), nullable=False) # user, assistant
     content = Column(Text, nullable=False)
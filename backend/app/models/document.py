@@ -3,11 +3,11 @@ import uuid
 from datetime import datetime
 from enum import Enum
 from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float, Text, Boolean
-from sqlalchemy import Enum as SQLEnum, JSON
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Computed, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
-from app.database import Base
+from app.database import Base, BulkInsertMixin
 
 
 class DocumentType(str, Enum):
@@ -33,18 +33,39 @@ class Document(Base):
     """Document record with metadata and processing status."""
     
     __tablename__ = "documents"
+    __table_args__ = (
+        # Partial covering indexes for the processing queue and failed documents
+        Index(
+            "ix_documents_queue", "tenant_id", "status", "created_at",
+            postgresql_include=["filename", "file_hash"],
+            postgresql_where=text("status IN ('queued', 'processing')"),
+        ),
+        Index(
+            "ix_documents_failed", "tenant_id", "created_at",
+            postgresql_include=["filename", "file_hash"],
+            postgresql_where=text("status = 'failed'"),
+        ),
+        Index("ix_documents_warnings_gin", "warnings", postgresql_using="gin", postgresql_ops={"warnings": "jsonb_path_ops"}),
+        Index("ix_documents_raw_text_tsv", "raw_text_tsv", postgresql_using="gin"),
+        Index("ix_documents_raw_text_trgm", text("lower(raw_text) gin_trgm_ops"), postgresql_using="gin"),
+        Index("ix_documents_tenant_created", "tenant_id", text("created_at DESC")),
+        Index("ix_documents_tenant_status_created", "tenant_id", "status", text("created_at DESC")),
+        Index("ix_documents_tenant_size", "tenant_id", "file_size_bytes"),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Client-side default so the id is known before flush
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
     
     # File info
-    filename = Column(String(512), nullable=False)
-    file_path = Column(String(1024), nullable=False)
+    filename = Column(Text, nullable=False)
+    file_path = Column(Text, nullable=False)
     file_hash = Column(String(64), nullable=False)  # SHA-256
     file_size_bytes = Column(Integer, nullable=False)
+    page_count = Column(Integer, nullable=True)  # Set at ingest, None = not counted yet
     
     # Processing
-    status = Column(String(20), nullable=False, default='queued')
+    status = Column(String(20), nullable=False, default='queued')  # DocumentStatus values, CHECK-constrained
     is_scanned = Column(Boolean, nullable=True)  # None = not determined yet
     ocr_quality = Column(Float, nullable=True)  # 0-1 confidence
     
@@ -55,9 +76,10 @@ class Document(Base):
     
     # Extracted text
     raw_text = Column(Text, nullable=True)
+    raw_text_tsv = deferred(Column(TSVECTOR, Computed("to_tsvector('italian', coalesce(raw_text, ''))", persisted=True)))
     
     # Warnings/errors
-    warnings = Column(JSON, nullable=False, default=list)
+    warnings = Column(JSONB, nullable=False, default=list)
     error_message = Column(Text, nullable=True)
     
     # Metadata - key extracted fields for quick access
@@ -85,18 +107,22 @@ class Document(Base):
     
     # Relationships
     tenant = relationship("Tenant", back_populates="documents")
-    pages = relationship("DocumentPage", back_populates="document", cascade="all, delete-orphan")
-    fields = relationship("ExtractedField", back_populates="document", cascade="all, delete-orphan")
-    lines = relationship("DocumentLine", back_populates="document", cascade="all, delete-orphan")
+    pages = relationship("DocumentPage", back_populates="document", cascade="all, delete-orphan", passive_deletes=True)
+    fields = relationship("ExtractedField", back_populates="document", cascade="all, delete-orphan", passive_deletes=True)
+    lines = relationship("DocumentLine", back_populates="document", cascade="all, delete-orphan", passive_deletes=True)
 
 
-class DocumentPage(Base):
+class DocumentPage(BulkInsertMixin, Base):
     """Individual page within a document."""
     
     __tablename__ = "document_pages"
+    __table_args__ = (
+        # One row per page: rotation upserts and page inserts conflict on it
+        Index("ux_document_pages_doc_page", "document_id", "page_number", unique=True),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id"), nullable=False)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
     
     page_number = Column(Integer, nullable=False)
     text_content = Column(Text, nullable=True)
@@ -1,14 +1,12 @@
 """Extraction models: fields, lines, and field events for audit."""
-import uuid
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float, Text
-from sqlalchemy import Enum as SQLEnum, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float, Text, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC
 
-from app.database import Base
+from app.database import Base, BulkInsertMixin
 
 
 class ExtractedField(Base):
@@ -16,8 +14,8 @@ class ExtractedField(Base):
     
     __tablename__ = "extracted_fields"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id"), nullable=False)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
     
     field_name = Column(String(100), nullable=False)
     raw_value = Column(Text, nullable=True)
@@ -26,7 +24,7 @@ class ExtractedField(Base):
     
     # Evidence
     page = Column(Integer, nullable=True)
-    bbox = Column(JSON, nullable=True)  # {"x": 0, "y": 0, "w": 100, "h": 20}
+    bbox = Column(JSONB, nullable=True)  # {"x": 0, "y": 0, "w": 100, "h": 20}
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -34,16 +32,21 @@ class ExtractedField(Base):
     
     # Relationships
     document = relationship("Document", back_populates="fields")
-    events = relationship("FieldEvent", back_populates="field", cascade="all, delete-orphan")
+    events = relationship("FieldEvent", back_populates="field", cascade="all, delete-orphan", passive_deletes=True)
 
 
-class DocumentLine(Base):
+class DocumentLine(BulkInsertMixin, Base):
     """Line item from a document (e.g., order line, invoice line)."""
     
     __tablename__ = "document_lines"
+    __table_args__ = (
+        Index("ix_document_lines_doc_line", "document_id", "line_number"),
+        {"postgresql_partition_by": "HASH (document_id)"},
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id"), nullable=False)
+    # The partition key is part of the primary key (PostgreSQL requirement)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
     
     line_number = Column(Integer, nullable=False)
     item_code = Column(String(100), nullable=True)
@@ -55,10 +58,10 @@ class DocumentLine(Base):
     
     confidence = Column(Float, nullable=False, default=0.0)
     page = Column(Integer, nullable=True)
-    bbox = Column(JSON, nullable=True)
+    bbox = Column(JSONB, nullable=True)
     
     # Embedding for semantic search
-    embedding = Column(Vector(768), nullable=True)  # nomic-embed-text dimension
+    embedding = Column(HALFVEC(768), nullable=True)  # nomic-embed-text dimension, half precision
     
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
@@ -77,12 +80,15 @@ class FieldEvent(Base):
     """Audit trail for field modifications (human-in-the-loop)."""
     
     __tablename__ = "field_events"
+    __table_args__ = (
+        Index("ix_field_events_user", "user_id", text("created_at DESC")),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    field_id = Column(UUID(as_uuid=True), ForeignKey("extracted_fields.id"), nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    field_id = Column(UUID(as_uuid=True), ForeignKey("extracted_fields.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)  # Kept when the user is deleted
     
-    event_type = Column(SQLEnum(FieldEventType), nullable=False)
+    event_type = Column(String(20), nullable=False)  # FieldEventType values, CHECK-constrained
     old_value = Column(Text, nullable=True)
     new_value = Column(Text, nullable=True)
     comment = Column(Text, nullable=True)
@@ -1,8 +1,8 @@
 """Tenant model for multi-tenancy."""
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, DateTime, Index, Text, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -12,10 +12,14 @@ class Tenant(Base):
     """Tenant for multi-tenant isolation."""
     
     __tablename__ = "tenants"
+    __table_args__ = (
+        Index("ix_tenants_config_gin", "config", postgresql_using="gin", postgresql_ops={"config": "jsonb_path_ops"}),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    name = Column(String(255), nullable=False, unique=True)
-    config = Column(JSON, nullable=False, default=dict)
+    # Client-side default so the id is known before flush
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
+    name = Column(Text, nullable=False, unique=True)
+    config = Column(JSONB, nullable=False, default=dict)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -0,0 +1,20 @@
+"""Keyset pagination tokens shared by the list endpoints."""
+import base64
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Opaque page token for the (created_at, id) keyset."""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(token: str) -> tuple[datetime, UUID]:
+    """Parse a page token produced by encode_cursor."""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(token.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid page token")
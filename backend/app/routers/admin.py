@@ -3,44 +3,50 @@ from uuid import UUID
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db
+from app.models.extraction import FieldEvent
 from app.models.tenant import Tenant
-from app.models.user import User, UserRole
-from app.routers.auth import get_current_user, require_role, get_password_hash
+from app.models.user import User
+from app.responses import ORJSONResponse
+from app.routers.auth import get_current_user, require_admin, get_password_hash_async, invalidate_user_cache
 from app.schemas.tenant import TenantCreate, TenantRead, TenantUpdate
 from app.schemas.user import UserCreate, UserRead, UserUpdate
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+FOREIGN_KEY_VIOLATION = "23503"
+
 
 # ============ Tenant Management ============
 
 @router.get("/tenants", response_model=List[TenantRead])
 async def list_tenants(
-    current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all tenants (super admin only in multi-tenant setup)."""
-    return db.query(Tenant).all()
+    return (await db.scalars(select(Tenant))).all()
 
 
 @router.post("/tenants", response_model=TenantRead)
 async def create_tenant(
     tenant: TenantCreate,
-    current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new tenant."""
-    existing = db.query(Tenant).filter(Tenant.name == tenant.name).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Tenant name already exists")
-    
+    # UNIQUE(name) decides: one round trip on the happy path
     db_tenant = Tenant(**tenant.model_dump())
     db.add(db_tenant)
-    db.commit()
-    db.refresh(db_tenant)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Tenant name already exists")
     return db_tenant
 
 
@@ -48,19 +54,19 @@ async def create_tenant(
 async def update_tenant(
     tenant_id: UUID,
     update: TenantUpdate,
-    current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update tenant configuration."""
-    tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
+    tenant = await db.get(Tenant, tenant_id)
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant not found")
     
     for field, value in update.model_dump(exclude_unset=True).items():
         setattr(tenant, field, value)
     
-    db.commit()
-    db.refresh(tenant)
+    await db.commit()
+    await db.refresh(tenant)
     return tenant
 
 
@@ -68,40 +74,36 @@ async def update_tenant(
 
 @router.get("/users", response_model=List[UserRead])
 async def list_users(
-    current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all users in current tenant."""
-    return db.query(User).filter(User.tenant_id == current_user.tenant_id).all()
+    return (await db.scalars(select(User).where(User.tenant_id == current_user.tenant_id))).all()
 
 
 @router.post("/users", response_model=UserRead)
 async def create_user(
     user: UserCreate,
-    current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new user."""
-    # Verify tenant exists
-    tenant = db.query(Tenant).filter(Tenant.id == user.tenant_id).first()
-    if not tenant:
-        raise HTTPException(status_code=400, detail="Tenant not found")
-    
-    # Check email uniqueness
-    existing = db.query(User).filter(User.email == user.email).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
+    # FK(tenant_id) and UNIQUE(email) decide: one round trip on the happy path
     db_user = User(
         tenant_id=user.tenant_id,
         email=user.email,
-        hashed_password=get_password_hash(user.password),
+        hashed_password=await get_password_hash_async(user.password),
         full_name=user.full_name,
         role=user.role
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if getattr(e.orig, "pgcode", None) == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=400, detail="Tenant not found")
+        raise HTTPException(status_code=400, detail="Email already registered")
     return db_user
 
 
@@ -109,48 +111,50 @@ async def create_user(
 async def update_user(
     user_id: UUID,
     update: UserUpdate,
-    current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a user."""
-    user = db.query(User).filter(
+    user = await db.scalar(select(User).where(
         User.id == user_id,
         User.tenant_id == current_user.tenant_id
-    ).first()
+    ))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     update_data = update.model_dump(exclude_unset=True)
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
     
     for field, value in update_data.items():
         setattr(user, field, value)
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    invalidate_user_cache(user.id)
     return user
 
 
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: UUID,
-    current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Deactivate a user."""
-    user = db.query(User).filter(
+    user = await db.scalar(select(User).where(
         User.id == user_id,
         User.tenant_id == current_user.tenant_id
-    ).first()
+    ))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     if user.id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
-    user.is_active = "N"
-    db.commit()
+    user.is_active = False
+    await db.commit()
+    invalidate_user_cache(user.id)
     return {"message": "User deactivated"}
 
 
@@ -158,26 +162,24 @@ async def delete_user(
 
 @router.get("/audit")
 async def get_audit_log(
-    current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get audit log entries for current tenant."""
-    from app.models.extraction import FieldEvent
-    
-    events = db.query(FieldEvent).join(User).filter(
-        User.tenant_id == current_user.tenant_id
-    ).order_by(FieldEvent.created_at.desc()).limit(100).all()
+    # Plain column rows: no ORM hydration for a flat JSON list
+    events = (await db.execute(
+        select(
+            FieldEvent.id,
+            FieldEvent.field_id,
+            FieldEvent.user_id,
+            FieldEvent.event_type,
+            FieldEvent.old_value,
+            FieldEvent.new_value,
+            FieldEvent.comment,
+            FieldEvent.created_at,
+        ).join(User, User.id == FieldEvent.user_id).where(
+            User.tenant_id == current_user.tenant_id
+        ).order_by(FieldEvent.created_at.desc()).limit(100)
+    )).mappings().all()
     
-    return [
-        {
-            "id": str(e.id),
-            "field_id": str(e.field_id),
-            "user_id": str(e.user_id),
-            "event_type": e.event_type.value,
-            "old_value": e.old_value,
-            "new_value": e.new_value,
-            "comment": e.comment,
-            "created_at": e.created_at.isoformat()
-        }
-        for e in events
-    ]
+    return ORJSONResponse([dict(e) for e in events])
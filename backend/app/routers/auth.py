@@ -1,14 +1,23 @@
 """Authentication router."""
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User, UserRole
 from app.schemas.user import Token, TokenData, UserRead
 
@@ -21,15 +30,101 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
 ALGORITHM = "HS256"
 
+# Key and decode options prepared once; python-jose enforces the required claims
+_SECRET = settings.secret_key
+_DECODE_OPTIONS = {"require_exp": True, "require_sub": True}
+
+# Argon2id, 64 MiB / 3 passes / 4 lanes
+password_hasher = PasswordHasher(time_cost=3, memory_cost=65536, parallelism=4)
+
+# token digest -> (detached User, token exp); per process, so TTL bounds staleness across workers
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+# token digest -> verified claims; spares the HMAC + JSON decode on repeated hits (PDF range requests)
+_claims_cache: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def get_cached_user(token: str) -> User | None:
+    """User cached for this token, if the entry is still within the token's lifetime."""
+    key = _token_key(token)
+    cached = _user_cache.get(key)
+    if cached is None:
+        return None
+    user, exp = cached
+    if exp is not None and exp <= time.time():
+        _user_cache.pop(key, None)
+        return None
+    return user
+
+
+def decode_access_token(token: str) -> dict | None:
+    """Verified JWT claims, or None if the token is invalid or expired."""
+    key = _token_key(token)
+    payload = _claims_cache.get(key)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            return payload
+        _claims_cache.pop(key, None)
+    try:
+        payload = jwt.decode(token, _SECRET, algorithms=[ALGORITHM], options=_DECODE_OPTIONS)
+    except JWTError:
+        return None
+    # Only valid tokens are cached, so garbage tokens cannot flush the cache
+    _claims_cache[key] = payload
+    return payload
+
+
+def invalidate_user_cache(user_id: UUID) -> None:
+    """Drop cached sessions of a user (after role/activation/password changes)."""
+    for key, (user, _) in list(_user_cache.items()):
+        if user.id == user_id:
+            _user_cache.pop(key, None)
+
+
+def _is_bcrypt_hash(hashed_password: str) -> bool:
+    return hashed_password.startswith(("$2a$", "$2b$", "$2y$"))
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    """Verify a password against its hash (Argon2id or legacy bcrypt)."""
+    if _is_bcrypt_hash(hashed_password):
+        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True for legacy bcrypt hashes or Argon2 hashes with outdated parameters."""
+    return _is_bcrypt_hash(hashed_password) or password_hasher.check_needs_rehash(hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return password_hasher.hash(password)
+
+
+# Dedicated KDF threads: argon2/bcrypt release the GIL, so hashes run in parallel on
+# separate cores without competing with other threadpool work; the bound also caps
+# Argon2 memory at max_workers * 64 MiB.
+_kdf_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix="kdf")
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _kdf_executor, verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(_kdf_executor, get_password_hash, password)
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
@@ -37,25 +132,29 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.secret_key, algorithm=ALGORITHM)
+    return jwt.encode(to_encode, _SECRET, algorithm=ALGORITHM)
 
 
-def get_user_by_email(db: Session, email: str) -> User | None:
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     """Get user by email."""
-    return db.query(User).filter(User.email == email).first()
+    return await db.scalar(select(User).where(User.email == email))
 
 
-def authenticate_user(db: Session, email: str, password: str) -> User | None:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> User | None:
     """Authenticate user and return if valid."""
-    user = get_user_by_email(db, email)
-    if not user or not verify_password(password, user.hashed_password):
+    user = await get_user_by_email(db, email)
+    if not user or not await verify_password_async(password, user.hashed_password):
         return None
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await get_password_hash_async(password)
+        await db.commit()
     return user
 
 
 async def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get current user from JWT token."""
     credentials_exception = HTTPException(
@@ -63,44 +162,65 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    user = get_cached_user(token)
+    if user is not None:
+        return user
+    
+    # Claims already verified by AuthGateMiddleware, when it ran
+    payload = getattr(request.state, "token_claims", None) or decode_access_token(token)
+    if payload is None:
+        raise credentials_exception
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
         token_data = TokenData(
-            user_id=UUID(user_id),
+            user_id=UUID(payload["sub"]),
             tenant_id=UUID(payload.get("tenant_id")),
             role=payload.get("role")  # role is stored as string
         )
-    except JWTError:
+    except (TypeError, ValueError):  # malformed claims
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == token_data.user_id).first()
-    if user is None or user.is_active != "Y":
+    user = await db.get(User, token_data.user_id)
+    if user is None or not user.is_active:
         raise credentials_exception
+    
+    # Detached and read-only from here on: safe to share across requests
+    db.expunge(user)
+    _user_cache[_token_key(token)] = (user, payload.get("exp"))
     return user
 
 
-def require_role(*roles: UserRole):
-    """Dependency to require specific roles."""
-    async def role_checker(current_user: User = Depends(get_current_user)):
-        if current_user.role not in roles:
+class RoleChecker:
+    """Dependency requiring one of the given roles (one shared instance per role set)."""
+    
+    def __init__(self, *roles: UserRole):
+        # Plain values: a str-Enum member does not hash like its string value
+        self.roles = frozenset(UserRole(r).value for r in roles)
+    
+    async def __call__(self, current_user: User = Depends(get_current_user)) -> User:
+        if current_user.role not in self.roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions"
             )
         return current_user
-    return role_checker
+
+
+def require_role(*roles: UserRole) -> RoleChecker:
+    """Dependency to require specific roles."""
+    return RoleChecker(*roles)
+
+
+require_admin = RoleChecker(UserRole.ADMIN)
+require_operator = RoleChecker(UserRole.ADMIN, UserRole.OPERATORE)
 
 
 @router.post("/token", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login and get access token."""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
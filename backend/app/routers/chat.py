@@ -1,25 +1,61 @@
 """Chat router for RAG chatbot."""
-from uuid import UUID
+import logging
+import re
+from datetime import datetime
+from uuid import UUID, uuid4
 from typing import List
+import orjson
 from pydantic import BaseModel
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.cache import CACHE_ERRORS, get_redis
+from app.database import SessionLocal, get_async_db
+from app.models.chat import ChatSession, ChatMessage as DBChatMessage
 from app.models.user import User
+from app.pagination import decode_cursor, encode_cursor
+from app.responses import ORJSONResponse
 from app.routers.auth import get_current_user
+from app.services.bi import bi_service
+from app.services.rag import rag_service
+from app.services.reconciliation import reconciliation_service
 
 router = APIRouter(prefix="/chat", tags=["chat"])
+logger = logging.getLogger(__name__)
 
+HISTORY_LENGTH = 10  # Messages passed to the services as context
+HISTORY_TTL_SECONDS = 24 * 3600
 
-class ChatMessage(BaseModel):
-    """Chat message."""
-    role: str  # "user" or "assistant"
-    content: str
+RECONCILIATION_KEYWORDS = [
+    "arrivata", "consegnato", "merce", "ordine", "ddt",
+    "completo", "parziale", "mancante", "consegna"
+]
 
+BI_KEYWORDS = [
+    "quanto ho speso", "spesa totale", "totale fatture", 
+    "somma", "media", "quanti", "quante", 
+    "classifica", "top 5", "top 3", "top 10", "fornitori principali",
+    "andamento", "statistiche", "report", "riepilogo",
+    "a quanto ammonta", "totale", "complessivo"
+]
+
+# One compiled alternation per routing class: a single C-level scan per message
+RECONCILIATION_RE = re.compile("|".join(map(re.escape, RECONCILIATION_KEYWORDS)))
+BI_RE = re.compile("|".join(map(re.escape, BI_KEYWORDS)))
+
+# Whole-word fast path; the alternation still catches phrases and in-word hits
+RECONCILIATION_WORDS = frozenset(kw for kw in RECONCILIATION_KEYWORDS if " " not in kw)
+BI_WORDS = frozenset(kw for kw in BI_KEYWORDS if " " not in kw)
+WORD_RE = re.compile(r"\w+")
+
+
+def _mentions(message_lower: str, tokens: set[str], words: frozenset[str], pattern: re.Pattern) -> bool:
+    """Substring keyword match, answered from the token set when a keyword is a whole word."""
+    return not words.isdisjoint(tokens) or pattern.search(message_lower) is not None
 
-from app.models.chat import ChatSession, ChatMessage as DBChatMessage
 
 class ChatRequest(BaseModel):
     """Chat request."""
@@ -42,62 +78,85 @@ class ChatResponse(BaseModel):
     used_reconciliation: bool = False
 
 
+def _history_key(session_id: UUID) -> str:
+    return f"chat:hist:{session_id}"
+
+
+async def _get_cached_history(session_id: UUID) -> list[dict] | None:
+    """Last messages of a session from Redis (newest first in the list), or None on miss."""
+    try:
+        items = await get_redis().lrange(_history_key(session_id), 0, HISTORY_LENGTH - 1)
+    except CACHE_ERRORS as e:
+        logger.warning(f"Chat history cache unavailable: {e}")
+        return None
+    if not items:
+        return None
+    return [orjson.loads(item) for item in reversed(items)]
+
+
+async def _push_history(session_id: UUID, messages: list[dict], create: bool) -> None:
+    """Append messages (chronological) to the cached ring; only seeds a missing key when create=True."""
+    key = _history_key(session_id)
+    encoded = [orjson.dumps(m) for m in messages]
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            if create:
+                pipe.lpush(key, *encoded)
+            else:
+                # A missing key means a cold cache: don't seed it with a partial history
+                pipe.lpushx(key, *encoded)
+            pipe.ltrim(key, 0, HISTORY_LENGTH - 1)
+            pipe.expire(key, HISTORY_TTL_SECONDS)
+            await pipe.execute()
+    except CACHE_ERRORS as e:
+        logger.warning(f"Chat history cache unavailable: {e}")
+
+
+def _with_session(fn, *args, **kwargs):
+    """Run a sync DB-backed service call (in a worker thread) with its own session."""
+    with SessionLocal() as db:
+        return fn(db, *args, **kwargs)
+
+
 @router.post("", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Chat with documents using RAG + BI + Reconciliation.
     Persists history and uses it for context.
     """
-    from app.services.rag import RAGService
-    from app.services.reconciliation import ReconciliationService
-    from app.services.bi import bi_service
-    
     # 1. Session Management
     session = None
     if request.session_id:
-        session = db.query(ChatSession).filter(
+        session = await db.scalar(select(ChatSession).where(
             ChatSession.id == request.session_id,
             ChatSession.tenant_id == current_user.tenant_id
-        ).first()
-    
-    if not session:
-        # Create new session
-        title = request.message[:50] + "..." if len(request.message) > 50 else request.message
-        session = ChatSession(
-            user_id=current_user.id,
-            tenant_id=current_user.tenant_id,
-            title=title
-        )
-        db.add(session)
-        db.commit()
+        ))
     
-    # 2. Save User Message
-    user_msg = DBChatMessage(
-        session_id=session.id,
-        role="user",
-        content=request.message
-    )
-    db.add(user_msg)
-    db.commit()
-    
-    # 3. Retrieve Context (Last 10 messages)
-    history_msgs = db.query(DBChatMessage).filter(
-        DBChatMessage.session_id == session.id
-    ).order_by(DBChatMessage.created_at.desc()).limit(11).all() # +1 includes current
-    
-    # Convert to format expected by services (chronological order)
-    # Exclude the current message we just added to avoid duplication if service adds it
-    # Actually RAGService expects "history" as previous context.
+    # 2. Retrieve Context (Last 10 messages, before this turn): Redis ring, DB on miss
     history_dicts = []
-    for msg in reversed(history_msgs):
-        if msg.id != user_msg.id: # Exclude current
-            history_dicts.append({"role": msg.role, "content": msg.content})
+    if session:
+        history_dicts = await _get_cached_history(session.id)
+        if history_dicts is None:
+            history_rows = (await db.execute(
+                select(DBChatMessage.role, DBChatMessage.content).where(
+                    DBChatMessage.session_id == session.id
+                ).order_by(DBChatMessage.created_at.desc()).limit(HISTORY_LENGTH)
+            )).all()
+            # Chronological order for the services
+            history_dicts = [{"role": role, "content": content} for role, content in reversed(history_rows)]
+            if history_dicts:
+                await _push_history(session.id, history_dicts, create=True)
+    
+    # Release the connection while the services / LLM run
+    await db.commit()
+    user_ts = datetime.utcnow()
 
     message_lower = request.message.lower()
+    tokens = set(WORD_RE.findall(message_lower))
     
     # 4. Route Logic
     response_text = ""
@@ -105,60 +164,77 @@ async def chat(
     used_recon = False
     
     # A. Reconciliation
-    reconciliation_keywords = [
-        "arrivata", "consegnato", "merce", "ordine", "ddt",
-        "completo", "parziale", "mancante", "consegna"
-    ]
-    is_reconciliation = any(kw in message_lower for kw in reconciliation_keywords)
+    is_reconciliation = _mentions(message_lower, tokens, RECONCILIATION_WORDS, RECONCILIATION_RE)
     
     # B. BI / Analytics
-    bi_keywords = [
-        "quanto ho speso", "spesa totale", "totale fatture", 
-        "somma", "media", "quanti", "quante", 
-        "classifica", "top 5", "top 3", "top 10", "fornitori principali",
-        "andamento", "statistiche", "report", "riepilogo",
-        "a quanto ammonta", "totale", "complessivo"
-    ]
-    is_bi = any(kw in message_lower for kw in bi_keywords)
+    is_bi = _mentions(message_lower, tokens, BI_WORDS, BI_RE)
 
     if is_reconciliation:
-        recon_service = ReconciliationService(db, current_user.tenant_id)
-        result = recon_service.answer_query(request.message)
+        result = await run_in_threadpool(
+            _with_session, reconciliation_service.answer_query, current_user.tenant_id, request.message
+        )
         response_text = result["answer"]
         citations = [Citation(**c) for c in result.get("citations", [])]
         used_recon = True
         
     elif is_bi:
-        bi_result = bi_service.process_query(request.message)
+        bi_result = await run_in_threadpool(bi_service.process_query, request.message)
         if bi_result.get("sql") and bi_result.get("data"):
             response_text = bi_result["answer"]
             used_recon = False
         else:
             # Fallback to RAG if BI fails
-            rag_service = RAGService(db, current_user.tenant_id)
-            result = rag_service.query(request.message, history=history_dicts)
+            result = await run_in_threadpool(
+                _with_session, rag_service.query, current_user.tenant_id, request.message, history=history_dicts
+            )
             response_text = result["answer"]
             citations = [Citation(**c) for c in result.get("citations", [])]
 
     else:
         # Standard RAG
-        rag_service = RAGService(db, current_user.tenant_id)
-        result = rag_service.query(request.message, history=history_dicts)
+        result = await run_in_threadpool(
+            _with_session, rag_service.query, current_user.tenant_id, request.message, history=history_dicts
+        )
         response_text = result["answer"]
         citations = [Citation(**c) for c in result.get("citations", [])]
 
-    # 5. Save Assistant Response
-    asst_msg = DBChatMessage(
-        session_id=session.id,
-        role="assistant",
-        content=response_text,
-        metadata_={
-            "citations": [c.model_dump() for c in citations], # Pydantic v2 uses model_dump
-            "used_reconciliation": used_recon
-        }
+    # 5. Persist the turn (new session, user message, assistant response) in one transaction
+    is_new_session = session is None
+    if is_new_session:
+        title = request.message[:50] + "..." if len(request.message) > 50 else request.message
+        session = ChatSession(
+            id=uuid4(),  # Known before flush: the messages reference it
+            user_id=current_user.id,
+            tenant_id=current_user.tenant_id,
+            title=title
+        )
+        db.add(session)
+    
+    db.add_all([
+        DBChatMessage(
+            session_id=session.id,
+            role="user",
+            content=request.message,
+            created_at=user_ts
+        ),
+        DBChatMessage(
+            session_id=session.id,
+            role="assistant",
+            content=response_text,
+            metadata_={
+                "citations": [c.model_dump() for c in citations], # Pydantic v2 uses model_dump
+                "used_reconciliation": used_recon
+            },
+            created_at=datetime.utcnow()
+        ),
+    ])
+    await db.commit()
+    
+    await _push_history(
+        session.id,
+        [{"role": "user", "content": request.message}, {"role": "assistant", "content": response_text}],
+        create=is_new_session
     )
-    db.add(asst_msg)
-    db.commit()
     
     return ChatResponse(
         message=response_text,
@@ -171,13 +247,15 @@ async def chat(
 @router.get("/sessions")
 async def get_chat_sessions(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's chat sessions."""
-    sessions = db.query(ChatSession).filter(
-        ChatSession.user_id == current_user.id,
-        ChatSession.tenant_id == current_user.tenant_id
-    ).order_by(ChatSession.updated_at.desc()).all()
+    sessions = (await db.scalars(
+        select(ChatSession).where(
+            ChatSession.user_id == current_user.id,
+            ChatSession.tenant_id == current_user.tenant_id
+        ).order_by(ChatSession.updated_at.desc())
+    )).all()
     
     return [{"id": s.id, "title": s.title, "date": s.updated_at} for s in sessions]
 
@@ -185,26 +263,46 @@ async def get_chat_sessions(
 @router.get("/sessions/{session_id}")
 async def get_chat_messages(
     session_id: UUID,
+    after: str | None = Query(None, description="Page token from the X-Next-Cursor header"),
+    limit: int = Query(50, ge=1, le=200),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get messages for a specific session."""
-    session = db.query(ChatSession).filter(
-        ChatSession.id == session_id,
+    """Get messages for a specific session, oldest first (keyset paginated)."""
+    # Ownership check joined into the page query: one round trip in the common case
+    query = select(
+        DBChatMessage.id, DBChatMessage.role, DBChatMessage.content,
+        DBChatMessage.created_at, DBChatMessage.metadata_
+    ).join(ChatSession, ChatSession.id == DBChatMessage.session_id).where(
+        DBChatMessage.session_id == session_id,
         ChatSession.user_id == current_user.id
-    ).first()
+    )
+    if after:
+        query = query.where(
+            tuple_(DBChatMessage.created_at, DBChatMessage.id) > tuple_(*decode_cursor(after))
+        )
+    messages = (await db.execute(
+        query.order_by(DBChatMessage.created_at, DBChatMessage.id).limit(limit)
+    )).all()
     
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-        
-    messages = db.query(DBChatMessage).filter(
-        DBChatMessage.session_id == session.id
-    ).order_by(DBChatMessage.created_at.asc()).all()
+    # Empty page: tell an empty/exhausted session apart from a missing or foreign one
+    if not messages:
+        exists = await db.scalar(select(ChatSession.id).where(
+            ChatSession.id == session_id,
+            ChatSession.user_id == current_user.id
+        ))
+        if not exists:
+            raise HTTPException(status_code=404, detail="Session not found")
+    
+    headers = {}
+    if len(messages) == limit:
+        last = messages[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
     
-    return [{
+    return ORJSONResponse([{
         "role": m.role, 
         "content": m.content, 
         "created_at": m.created_at,
         "citations": (m.metadata_ or {}).get("citations", []),
         "used_reconciliation": (m.metadata_ or {}).get("used_reconciliation", False)
-    } for m in messages]
+    } for m in messages], headers=headers)
@@ -1,16 +1,21 @@
 """Dashboard router for BI widgets and KPIs."""
+import csv
+import io
 from datetime import datetime, timedelta
 from uuid import UUID
 from typing import List, Optional
 from pydantic import BaseModel
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.cache import get_cached_dashboard, set_cached_dashboard
+from app.database import AsyncSessionLocal, get_async_db
 from app.models.document import Document, DocumentStatus, DocumentType
 from app.models.user import User
+from app.responses import ORJSONResponse
 from app.routers.auth import get_current_user
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
@@ -48,131 +53,129 @@ class DashboardData(BaseModel):
 async def get_dashboard(
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get dashboard data for current tenant."""
     tenant_id = current_user.tenant_id
-    since = datetime.utcnow() - timedelta(days=days)
-    
-    # Total documents
-    total_docs = db.query(func.count(Document.id)).filter(
-        Document.tenant_id == tenant_id
-    ).scalar()
     
-    # Documents this period
-    period_docs = db.query(func.count(Document.id)).filter(
-        Document.tenant_id == tenant_id,
-        Document.created_at >= since
-    ).scalar()
+    # Short-lived per-tenant cache (dropped on ingestion)
+    cached = await get_cached_dashboard(tenant_id, days)
+    if cached is not None:
+        return Response(cached, media_type="application/json")
     
-    # Validated documents
-    validated_docs = db.query(func.count(Document.id)).filter(
-        Document.tenant_id == tenant_id,
-        Document.status == DocumentStatus.VALIDATED
-    ).scalar()
+    since = datetime.utcnow() - timedelta(days=days)
     
-    # Failed documents
-    failed_docs = db.query(func.count(Document.id)).filter(
-        Document.tenant_id == tenant_id,
-        Document.status == DocumentStatus.FAILED
-    ).scalar()
+    # Total / period / validated / failed in one scan
+    counts = (await db.execute(
+        select(
+            func.count().label("total"),
+            func.count().filter(Document.created_at >= since).label("period"),
+            func.count().filter(Document.status == DocumentStatus.VALIDATED).label("validated"),
+            func.count().filter(Document.status == DocumentStatus.FAILED).label("failed"),
+        ).where(Document.tenant_id == tenant_id)
+    )).one()
     
     kpis = [
-        KPICard(name="Total Documents", value=total_docs),
-        KPICard(name=f"Documents ({days}d)", value=period_docs),
-        KPICard(name="Validated", value=validated_docs),
-        KPICard(name="Failed", value=failed_docs),
+        {"name": name, "value": value, "unit": "", "trend": None}
+        for name, value in (
+            ("Total Documents", counts.total),
+            (f"Documents ({days}d)", counts.period),
+            ("Validated", counts.validated),
+            ("Failed", counts.failed),
+        )
     ]
     
     # By type
-    by_type_query = db.query(
-        Document.doc_type, func.count(Document.id)
-    ).filter(
-        Document.tenant_id == tenant_id,
-        Document.doc_type.isnot(None)
-    ).group_by(Document.doc_type).all()
+    by_type_query = (await db.execute(
+        select(Document.doc_type, func.count(Document.id)).where(
+            Document.tenant_id == tenant_id,
+            Document.doc_type.isnot(None)
+        ).group_by(Document.doc_type)
+    )).all()
     
-    by_type = [
-        DocumentsByType(doc_type=t.value if hasattr(t, 'value') else (t or "unknown"), count=c)
-        for t, c in by_type_query
-    ]
+    by_type = [{"doc_type": t or "unknown", "count": c} for t, c in by_type_query]
     
     # By status
-    by_status_query = db.query(
-        Document.status, func.count(Document.id)
-    ).filter(
-        Document.tenant_id == tenant_id
-    ).group_by(Document.status).all()
-    
-    by_status = [
-        DocumentsByStatus(status=s.value if hasattr(s, 'value') else s, count=c)
-        for s, c in by_status_query
-    ]
+    by_status_query = (await db.execute(
+        select(Document.status, func.count(Document.id)).where(
+            Document.tenant_id == tenant_id
+        ).group_by(Document.status)
+    )).all()
     
-    # Recent documents
-    recent = db.query(Document).filter(
-        Document.tenant_id == tenant_id
-    ).order_by(Document.created_at.desc()).limit(10).all()
+    by_status = [{"status": s, "count": c} for s, c in by_status_query]
     
+    # Recent documents: plain column rows, no ORM hydration
     recent_docs = [
-        {
-            "id": str(d.id),
-            "filename": d.filename,
-            "status": d.status.value if hasattr(d.status, 'value') else d.status,
-            "doc_type": (d.doc_type.value if hasattr(d.doc_type, 'value') else d.doc_type) if d.doc_type else None,
-            "created_at": d.created_at.isoformat()
-        }
-        for d in recent
+        dict(row) for row in (await db.execute(
+            select(
+                Document.id, Document.filename, Document.status,
+                Document.doc_type, Document.created_at
+            ).where(
+                Document.tenant_id == tenant_id
+            ).order_by(Document.created_at.desc()).limit(10)
+        )).mappings()
     ]
     
-    return DashboardData(
-        kpis=kpis,
-        by_type=by_type,
-        by_status=by_status,
-        recent_documents=recent_docs
-    )
+    # Plain dicts straight to orjson: DashboardData documents the shape only
+    response = ORJSONResponse({
+        "kpis": kpis,
+        "by_type": by_type,
+        "by_status": by_status,
+        "recent_documents": recent_docs
+    })
+    await set_cached_dashboard(tenant_id, days, response.body.decode())
+    return response
 
 
 @router.get("/export")
 async def export_data(
     format: str = Query("csv", pattern="^(csv|parquet)$"),
     doc_type: Optional[DocumentType] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """Export document data as CSV or Parquet."""
-    from fastapi.responses import StreamingResponse
-    import csv
-    import io
+    if format != "csv":
+        # Parquet export (requires pyarrow)
+        raise HTTPException(status_code=501, detail="Parquet export not yet implemented")
     
-    query = db.query(Document).filter(Document.tenant_id == current_user.tenant_id)
+    query = select(
+        Document.id, Document.filename, Document.doc_type, Document.doc_number,
+        Document.doc_date, Document.status, Document.created_at
+    ).where(Document.tenant_id == current_user.tenant_id)
     if doc_type:
-        query = query.filter(Document.doc_type == doc_type)
+        query = query.where(Document.doc_type == doc_type.value)
     
-    documents = query.all()
+    async def generate_csv():
+        # Own session: the stream outlives the request's dependencies
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(query.execution_options(yield_per=1000))
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(["id", "filename", "doc_type", "doc_number", "doc_date", "status", "created_at"])
+            
+            async for batch in result.partitions():
+                writer.writerows(
+                    [
+                        str(row.id),
+                        row.filename,
+                        row.doc_type or "",
+                        row.doc_number or "",
+                        row.doc_date.isoformat() if row.doc_date else "",
+                        row.status,
+                        row.created_at.isoformat()
+                    ]
+                    for row in batch
+                )
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+            
+            # Header only (no rows)
+            if output.tell():
+                yield output.getvalue()
     
-    if format == "csv":
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["id", "filename", "doc_type", "doc_number", "doc_date", "status", "created_at"])
-        
-        for doc in documents:
-            writer.writerow([
-                str(doc.id),
-                doc.filename,
-                doc.doc_type.value if doc.doc_type else "",
-                doc.doc_number or "",
-                doc.doc_date.isoformat() if doc.doc_date else "",
-                doc.status.value,
-                doc.created_at.isoformat()
-            ])
-        
-        output.seek(0)
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=documents.csv"}
-        )
-    else:
-        # Parquet export (requires pyarrow)
-        raise HTTPException(status_code=501, detail="Parquet export not yet implemented")
+    return StreamingResponse(
+        generate_csv(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=documents.csv"}
+    )
@@ -1,53 +1,175 @@
 """Documents router."""
+import os
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
 from uuid import UUID
-from typing import List
+from typing import List, NamedTuple
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+from sqlalchemy import Text, delete, exists, func, insert, literal, select, tuple_, update as sa_update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.database import get_db
-from app.models.document import Document, DocumentStatus, DocumentType
+from app.cache import PREVIEW_TTL_SECONDS, get_cached_preview, preview_key, set_cached_preview
+from app.config import get_settings
+from app.database import get_async_db
+from app.models.document import Document, DocumentPage, DocumentStatus, DocumentType
 from app.models.extraction import ExtractedField, DocumentLine, FieldEvent, FieldEventType
 from app.models.user import User, UserRole
-from app.routers.auth import get_current_user
+from app.pagination import decode_cursor, encode_cursor
+from app.routers.auth import decode_access_token, get_current_user
 from app.schemas.document import DocumentRead, DocumentListItem, DocumentUpdate
 from app.schemas.extraction import ExtractedFieldRead, ExtractedFieldUpdate, DocumentLineRead
+from app.services.extraction import count_pages, render_page_jpeg
+from app.workers.celery_app import PROCESS_DOCUMENT, PROCESS_DOCUMENT_AFTER_ROTATION, enqueue
 
 router = APIRouter(prefix="/documents", tags=["documents"])
+settings = get_settings()
+
+PREVIEW_DPI = 150
+PDF_MAX_AGE_SECONDS = 600
+
+
+class DocumentFile(NamedTuple):
+    """Columns fixed at ingest: safe to serve from a short-lived cache."""
+    file_path: str
+    file_hash: str
+    filename: str
+
+
+# (document_id, tenant_id) -> DocumentFile; collapses PDF range requests and preview bursts
+_document_file_cache: TTLCache = TTLCache(maxsize=1024, ttl=5)
+
+
+async def get_owned_document(
+    document_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Document:
+    """Dependency: the tenant's document, loaded in the request session, or 404."""
+    doc = await db.scalar(
+        select(Document).where(
+            Document.id == document_id,
+            Document.tenant_id == current_user.tenant_id
+        )
+    )
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return doc
+
+
+async def _get_document_file(db: AsyncSession, document_id: UUID, tenant_id: UUID) -> DocumentFile:
+    """File info of a tenant's document (ownership check included), or 404."""
+    key = (document_id, tenant_id)
+    cached = _document_file_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    row = (await db.execute(
+        select(Document.file_path, Document.file_hash, Document.filename).where(
+            Document.id == document_id,
+            Document.tenant_id == tenant_id
+        )
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    info = _document_file_cache[key] = DocumentFile(*row)
+    return info
+
+
+def _accel_redirect_path(request: Request, file_path: str) -> str | None:
+    """Nginx internal URI for a file under upload_dir, if X-Accel-Redirect is configured.
+
+    Only for requests proxied by our Nginx (it sets X-Accel-Allowed): a client talking to
+    uvicorn directly would otherwise get an empty body.
+    """
+    if not settings.accel_redirect_prefix or not request.headers.get("x-accel-allowed"):
+        return None
+    try:
+        relative = Path(file_path).relative_to(settings.upload_dir)
+    except ValueError:
+        return None
+    return settings.accel_redirect_prefix.rstrip("/") + "/" + quote(relative.as_posix())
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as for GET)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+async def _document_exists(db: AsyncSession, document_id: UUID, tenant_id: UUID) -> bool:
+    """Tell "no document" apart from "no child rows" after an empty joined query.
+
+    Always hits the DB: _document_file_cache is per-process and would keep reporting
+    a document deleted through another worker for its whole TTL.
+    """
+    return await db.scalar(
+        select(exists().where(Document.id == document_id, Document.tenant_id == tenant_id))
+    )
 
 
 @router.get("", response_model=List[DocumentListItem])
 async def list_documents(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    before: str | None = Query(None, description="Page token from the X-Next-Cursor header"),
+    skip: int = Query(0, ge=0, description="Deprecated: use `before`"),
     limit: int = Query(50, ge=1, le=100),
     status: DocumentStatus | None = None,
     doc_type: DocumentType | None = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List documents for current tenant."""
-    query = db.query(Document).filter(Document.tenant_id == current_user.tenant_id)
+    # Only the DocumentListItem columns (no raw_text / ORM hydration)
+    query = select(
+        Document.id, Document.filename, Document.status, Document.doc_type,
+        Document.doc_type_confidence, Document.doc_number, Document.doc_date,
+        Document.created_at, Document.warnings
+    ).where(Document.tenant_id == current_user.tenant_id)
     
     if status:
-        query = query.filter(Document.status == status)
+        query = query.where(Document.status == status)
     if doc_type:
-        query = query.filter(Document.doc_type == doc_type)
-    
-    query = query.order_by(Document.created_at.desc())
-    return query.offset(skip).limit(limit).all()
+        query = query.where(Document.doc_type == doc_type)
+    
+    # Keyset on (created_at, id): constant cost per page, whatever the depth
+    if before:
+        query = query.where(tuple_(Document.created_at, Document.id) < tuple_(*decode_cursor(before)))
+    elif skip:
+        query = query.offset(skip)
+        response.headers["Deprecation"] = "true"
+    
+    query = query.order_by(Document.created_at.desc(), Document.id.desc()).limit(limit)
+    rows = (await db.execute(query)).mappings().all()
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return rows
 
 
 @router.get("/{document_id}", response_model=DocumentRead)
 async def get_document(
     document_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get document by ID."""
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
+    # DocumentRead serializes pages: load them with the document
+    doc = await db.scalar(
+        select(Document).options(selectinload(Document.pages)).where(
+            Document.id == document_id,
+            Document.tenant_id == current_user.tenant_id
+        )
+    )
     
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
@@ -59,25 +181,26 @@ async def update_document(
     document_id: UUID,
     update: DocumentUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update document (e.g., override type)."""
     if current_user.role == UserRole.MANAGER:
         raise HTTPException(status_code=403, detail="Managers cannot modify documents")
     
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
+    # UPDATE ... RETURNING: ownership check, write and post-update row in one statement
+    doc = await db.scalar(
+        sa_update(Document).where(
+            Document.id == document_id,
+            Document.tenant_id == current_user.tenant_id
+        ).values(**update.model_dump(exclude_unset=True)).returning(Document)
+    )
     
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    for field, value in update.model_dump(exclude_unset=True).items():
-        setattr(doc, field, value)
-    
-    db.commit()
-    db.refresh(doc)
+    # DocumentRead serializes pages and AsyncSession does not lazy-load
+    await db.refresh(doc, ["pages"])
+    await db.commit()
     return doc
 
 
@@ -85,20 +208,19 @@ async def update_document(
 async def get_document_fields(
     document_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get extracted fields for a document."""
-    # Verify document belongs to tenant
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
-    if not doc:
+    # Tenant check through the parent join, one round-trip on the hot path
+    fields = (await db.scalars(
+        select(ExtractedField).join(Document).where(
+            Document.id == document_id,
+            Document.tenant_id == current_user.tenant_id
+        )
+    )).all()
+    if not fields and not await _document_exists(db, document_id, current_user.tenant_id):
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    return db.query(ExtractedField).filter(
-        ExtractedField.document_id == document_id
-    ).all()
+    return fields
 
 
 @router.patch("/{document_id}/fields/{field_id}", response_model=ExtractedFieldRead)
@@ -107,50 +229,54 @@ async def update_field(
     field_id: UUID,
     update: ExtractedFieldUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update extracted field with audit trail."""
     if current_user.role == UserRole.MANAGER:
         raise HTTPException(status_code=403, detail="Managers cannot modify fields")
     
-    # Verify document belongs to tenant
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
+    now = datetime.utcnow()
+    new_value = update.normalized_value or update.raw_value
+    changes = {"updated_at": now}
+    if update.raw_value is not None:
+        changes["raw_value"] = update.raw_value
+    if update.normalized_value is not None:
+        changes["normalized_value"] = update.normalized_value
     
-    field = db.query(ExtractedField).filter(
+    # One statement: lock + read the old value, update the field, write the audit event
+    old = select(
+        ExtractedField.id,
+        func.coalesce(func.nullif(ExtractedField.normalized_value, ""), ExtractedField.raw_value).label("old_value"),
+    ).join(Document).where(
         ExtractedField.id == field_id,
-        ExtractedField.document_id == document_id
-    ).first()
+        Document.id == document_id,
+        Document.tenant_id == current_user.tenant_id
+    ).with_for_update(of=ExtractedField).cte("old")
+    
+    updated = ExtractedField.__table__.update().where(
+        ExtractedField.id == old.c.id
+    ).values(changes).returning(*ExtractedField.__table__.c, old.c.old_value).cte("updated")
+    
+    audit = insert(FieldEvent).from_select(
+        ["field_id", "user_id", "event_type", "old_value", "new_value", "comment", "created_at"],
+        select(
+            updated.c.id,
+            literal(current_user.id),
+            literal(FieldEventType.UPDATED.value),
+            updated.c.old_value,
+            literal(new_value, Text),
+            literal(update.comment, Text),
+            literal(now),
+        ).where(updated.c.old_value.is_distinct_from(literal(new_value, Text)))
+    ).cte("audit")
+    
+    field = (await db.execute(select(updated).add_cte(audit))).mappings().first()
     if not field:
+        if not await _document_exists(db, document_id, current_user.tenant_id):
+            raise HTTPException(status_code=404, detail="Document not found")
         raise HTTPException(status_code=404, detail="Field not found")
     
-    # Create audit event
-    old_value = field.normalized_value or field.raw_value
-    new_value = update.normalized_value or update.raw_value
-    
-    if old_value != new_value:
-        event = FieldEvent(
-            field_id=field_id,
-            user_id=current_user.id,
-            event_type=FieldEventType.UPDATED,
-            old_value=old_value,
-            new_value=new_value,
-            comment=update.comment
-        )
-        db.add(event)
-    
-    # Update field
-    if update.raw_value is not None:
-        field.raw_value = update.raw_value
-    if update.normalized_value is not None:
-        field.normalized_value = update.normalized_value
-    
-    db.commit()
-    db.refresh(field)
+    await db.commit()
     return field
 
 
@@ -158,67 +284,65 @@ async def update_field(
 async def get_document_lines(
     document_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get line items for a document."""
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
-    if not doc:
+    lines = (await db.scalars(
+        select(DocumentLine).join(Document).where(
+            Document.id == document_id,
+            Document.tenant_id == current_user.tenant_id
+        ).order_by(DocumentLine.line_number)
+    )).all()
+    if not lines and not await _document_exists(db, document_id, current_user.tenant_id):
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    return db.query(DocumentLine).filter(
-        DocumentLine.document_id == document_id
-    ).order_by(DocumentLine.line_number).all()
+    return lines
 
 
 @router.get("/{document_id}/pdf")
 async def get_document_pdf(
     document_id: UUID,
+    request: Request,
     token: str | None = Query(None, description="Auth token for iframe access"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get PDF file for document viewer. Accepts token via query param for iframe embedding."""
-    from fastapi.responses import Response
-    from jose import JWTError, jwt
-    from app.config import get_settings
-    import os
-    
-    settings = get_settings()
-    
     # Get token from query param
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
+    payload = decode_access_token(token)
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
-        tenant_id = UUID(payload.get("tenant_id"))
-    except (JWTError, ValueError):
+        tenant_id = UUID(payload["tenant_id"])
+    except (TypeError, KeyError, ValueError):
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == tenant_id
-    ).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
+    doc = await _get_document_file(db, document_id, tenant_id)
+    
+    # Content-addressed: the SHA-256 taken at ingest identifies the bytes
+    headers = {"ETag": f'"{doc.file_hash}"', "Cache-Control": f"private, max-age={PDF_MAX_AGE_SECONDS}"}
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
     
     # Check file exists
     if not os.path.exists(doc.file_path):
         raise HTTPException(status_code=404, detail="PDF file not found on disk")
     
-    # Read file and return with inline disposition for browser preview
-    with open(doc.file_path, "rb") as f:
-        content = f.read()
-    
-    return Response(
-        content=content,
+    # Behind Nginx: hand the file off (sendfile from an internal location), no body from Python
+    accel_path = _accel_redirect_path(request, doc.file_path)
+    if accel_path:
+        headers.update({
+            "X-Accel-Redirect": accel_path,
+            "Content-Disposition": f"inline; filename*=utf-8''{quote(doc.filename)}",
+        })
+        return Response(media_type="application/pdf", headers=headers)
+    
+    # Streamed from disk (sendfile when available), inline for browser preview
+    return FileResponse(
+        doc.file_path,
         media_type="application/pdf",
-        headers={
-            "Content-Disposition": f'inline; filename="{doc.filename}"',
-            "Content-Length": str(len(content))
-        }
+        filename=doc.filename,
+        content_disposition_type="inline",
+        headers=headers,
     )
 
 
@@ -226,47 +350,43 @@ async def get_document_pdf(
 async def get_page_preview(
     document_id: UUID,
     page_num: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get page preview image as base64 JPEG for rotation modal."""
-    from fastapi.responses import Response
-    from app.services.extraction import get_page_as_image
-    from app.models.document import DocumentPage
-    import io
-    
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
+    doc = await _get_document_file(db, document_id, current_user.tenant_id)
     
     # Get page rotation if exists
-    page = db.query(DocumentPage).filter(
-        DocumentPage.document_id == document_id,
-        DocumentPage.page_number == page_num
-    ).first()
+    rotation = await db.scalar(
+        select(DocumentPage.rotation_angle).where(
+            DocumentPage.document_id == document_id,
+            DocumentPage.page_number == page_num
+        )
+    ) or 0
+    
+    key = preview_key(document_id, page_num, rotation, PREVIEW_DPI)
+    headers = {
+        "Cache-Control": f"private, max-age={PREVIEW_TTL_SECONDS}",
+        "ETag": f'"{doc.file_hash[:16]}-{page_num}-{rotation}-{PREVIEW_DPI}"',
+    }
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
     
-    rotation = page.rotation_angle if page else 0
+    cached = await get_cached_preview(key)
+    if cached is not None:
+        return Response(content=cached, media_type="image/jpeg", headers=headers)
     
-    # Render page as image
+    # Render page as JPEG (MuPDF encodes directly, rotation applied while rasterizing)
     try:
-        image = get_page_as_image(doc.file_path, page_num, dpi=150)
-        if rotation:
-            image = image.rotate(-rotation, expand=True)  # Negative for clockwise
-        
-        # Convert to JPEG
-        buffer = io.BytesIO()
-        image.save(buffer, format="JPEG", quality=85)
-        buffer.seek(0)
-        
-        return Response(
-            content=buffer.read(),
-            media_type="image/jpeg"
+        content = await run_in_threadpool(
+            render_page_jpeg, doc.file_path, page_num, dpi=PREVIEW_DPI, rotation=rotation
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to render page: {str(e)}")
+    
+    await set_cached_preview(key, content)
+    return Response(content=content, media_type="image/jpeg", headers=headers)
 
 
 @router.patch("/{document_id}/pages/{page_num}/rotation")
@@ -275,58 +395,37 @@ async def set_page_rotation(
     page_num: int,
     rotation: int = Query(..., description="Rotation angle: 0, 90, 180, or 270"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Set rotation angle for a page."""
-    from app.models.document import DocumentPage
-    
     if rotation not in (0, 90, 180, 270):
         raise HTTPException(status_code=400, detail="Rotation must be 0, 90, 180, or 270")
     
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
-    if not doc:
+    # Upsert in one statement; the INSERT ... SELECT finds no row for another tenant's document
+    owned = select(
+        Document.id, literal(page_num), literal(rotation)
+    ).where(Document.id == document_id, Document.tenant_id == current_user.tenant_id)
+    stmt = pg_insert(DocumentPage).from_select(
+        ["document_id", "page_number", "rotation_angle"], owned
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["document_id", "page_number"],
+        set_={"rotation_angle": stmt.excluded.rotation_angle},
+    ).returning(DocumentPage.id)
+    if await db.scalar(stmt) is None:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # Get or create page record
-    page = db.query(DocumentPage).filter(
-        DocumentPage.document_id == document_id,
-        DocumentPage.page_number == page_num
-    ).first()
-    
-    if page:
-        page.rotation_angle = rotation
-    else:
-        # Create page record if doesn't exist
-        page = DocumentPage(
-            document_id=document_id,
-            page_number=page_num,
-            rotation_angle=rotation
-        )
-        db.add(page)
-    
-    db.commit()
+    await db.commit()
     return {"message": f"Page {page_num} rotation set to {rotation}°", "rotation": rotation}
 
 
 @router.post("/{document_id}/confirm-rotation")
 async def confirm_rotation(
     document_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    doc: Document = Depends(get_owned_document),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Confirm rotations and resume document processing."""
-    from app.workers.tasks import process_document_after_rotation
-    
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-    
     if doc.status != DocumentStatus.NEEDS_ROTATION.value:
         raise HTTPException(
             status_code=400, 
@@ -335,73 +434,50 @@ async def confirm_rotation(
     
     # Reset to processing and queue the task
     doc.status = DocumentStatus.PROCESSING.value
-    db.commit()
+    await db.commit()
     
     # Queue task for processing with rotations applied
-    process_document_after_rotation.delay(str(document_id))
+    enqueue(PROCESS_DOCUMENT_AFTER_ROTATION, document_id)
     
     return {"message": f"Document {doc.filename} queued for processing with rotations applied"}
 
 
 @router.get("/{document_id}/page-count")
 async def get_page_count(
-    document_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    doc: Document = Depends(get_owned_document),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get total page count for a document."""
-    import fitz
-    
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
+    if doc.page_count is not None:
+        return {"page_count": doc.page_count}
     
     try:
-        pdf = fitz.open(doc.file_path)
-        page_count = len(pdf)
-        pdf.close()
-        return {"page_count": page_count}
+        page_count = await run_in_threadpool(count_pages, doc.file_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read PDF: {str(e)}")
+    
+    doc.page_count = page_count
+    await db.commit()
+    return {"page_count": page_count}
 
 
 @router.delete("/{document_id}")
 async def delete_document(
-    document_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    doc: Document = Depends(get_owned_document),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a document and all related data."""
-    import os
-    from app.models.document import DocumentPage
-    
     if current_user.role == UserRole.MANAGER:
         raise HTTPException(status_code=403, detail="Managers cannot delete documents")
     
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-    
     file_path = doc.file_path
     filename = doc.filename
     
-    # Delete related data
-    db.query(FieldEvent).filter(
-        FieldEvent.field_id.in_(
-            db.query(ExtractedField.id).filter(ExtractedField.document_id == document_id)
-        )
-    ).delete(synchronize_session=False)
-    db.query(ExtractedField).filter(ExtractedField.document_id == document_id).delete()
-    db.query(DocumentLine).filter(DocumentLine.document_id == document_id).delete()
-    db.query(DocumentPage).filter(DocumentPage.document_id == document_id).delete()
-    db.delete(doc)
-    db.commit()
+    # Pages, lines, fields and field events go with ON DELETE CASCADE
+    await db.delete(doc)
+    await db.commit()
+    _document_file_cache.pop((doc.id, doc.tenant_id), None)
     
     # Delete file from disk
     if file_path and os.path.exists(file_path):
@@ -417,31 +493,23 @@ async def delete_document(
 async def reprocess_document(
     document_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    doc: Document = Depends(get_owned_document),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Reprocess a document (re-run OCR and extraction)."""
-    from app.models.document import DocumentPage
-    from app.workers.tasks import process_document
-    
     if current_user.role == UserRole.MANAGER:
         raise HTTPException(status_code=403, detail="Managers cannot reprocess documents")
     
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-    
-    # Clear previous extraction data
-    db.query(FieldEvent).filter(
-        FieldEvent.field_id.in_(
-            db.query(ExtractedField.id).filter(ExtractedField.document_id == document_id)
-        )
-    ).delete(synchronize_session=False)
-    db.query(ExtractedField).filter(ExtractedField.document_id == document_id).delete()
-    db.query(DocumentLine).filter(DocumentLine.document_id == document_id).delete()
-    db.query(DocumentPage).filter(DocumentPage.document_id == document_id).delete()
+    # Clear previous extraction data in one statement (field events cascade)
+    clear_fields = delete(ExtractedField).where(ExtractedField.document_id == document_id).cte("clear_fields")
+    clear_lines = delete(DocumentLine).where(DocumentLine.document_id == document_id).cte("clear_lines")
+    await db.execute(
+        delete(DocumentPage)
+        .where(DocumentPage.document_id == document_id)
+        .add_cte(clear_fields)
+        .add_cte(clear_lines),
+        execution_options={"synchronize_session": False},
+    )
     
     # Reset document status
     doc.status = DocumentStatus.QUEUED.value
@@ -452,35 +520,28 @@ async def reprocess_document(
     doc.error_message = None
     doc.warnings = []
     
-    db.commit()
+    await db.commit()
     
     # Queue for processing
-    process_document.delay(str(document_id))
+    enqueue(PROCESS_DOCUMENT, document_id, force=True)
     
     return {"message": f"Document '{doc.filename}' queued for reprocessing"}
 
 
 @router.post("/{document_id}/stop-processing")
 async def stop_processing(
-    document_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    doc: Document = Depends(get_owned_document),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Stop processing a document and mark it as failed."""
     if current_user.role == UserRole.MANAGER:
         raise HTTPException(status_code=403, detail="Managers cannot stop document processing")
     
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-    
     # Set to failed with message
     doc.status = DocumentStatus.FAILED.value
     doc.error_message = "Processing stopped manually by user"
     
-    db.commit()
+    await db.commit()
     
     return {"message": f"Document '{doc.filename}' processing stopped"}
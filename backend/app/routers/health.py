@@ -1,5 +1,10 @@
 """Health check router."""
 from fastapi import APIRouter
+from sqlalchemy import text
+
+from app.cache import CACHE_ERRORS, get_redis
+from app.database import async_engine
+from app.responses import ORJSONResponse
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -12,6 +17,31 @@ async def health_check():
 
 @router.get("/ready")
 async def readiness_check():
-    """Readiness check (DB + Redis connectivity)."""
-    # TODO: Add actual DB and Redis checks
-    return {"status": "ready", "checks": {"database": "ok", "redis": "ok"}}
+    """Readiness check (DB + Redis connectivity, API connection pool usage)."""
+    checks = {}
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        checks["database"] = "ok"
+    except Exception as e:
+        checks["database"] = f"error: {e}"
+    
+    try:
+        await get_redis().ping()
+        checks["redis"] = "ok"
+    except CACHE_ERRORS as e:
+        checks["redis"] = f"error: {e}"
+    
+    pool = async_engine.pool
+    pool_status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),  # negative until the pool has filled up
+    }
+    
+    ready = all(v == "ok" for v in checks.values())
+    return ORJSONResponse(
+        {"status": "ready" if ready else "not_ready", "checks": checks, "pool": pool_status},
+        status_code=200 if ready else 503,
+    )
@@ -1,39 +1,136 @@
 """Ingestion router for document upload and folder processing."""
+import asyncio
+import fcntl
 import hashlib
+import io
+import mmap
 import os
 import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from uuid import UUID, uuid4
 from typing import List
 
+from cachetools import LRUCache
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
-from sqlalchemy.orm import Session
+from PIL import Image
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import get_cached_job, invalidate_dashboard, set_cached_job
 from app.config import get_settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models.document import Document, DocumentStatus
-from app.models.user import User, UserRole
-from app.routers.auth import get_current_user, require_role
+from app.models.extraction import ExtractedField, DocumentLine
+from app.models.user import User
+from app.routers.auth import get_current_user, require_operator
 from app.schemas.document import DocumentListItem, JobStatus
+from app.workers.celery_app import PROCESS_DOCUMENT, enqueue
 
 router = APIRouter(prefix="/ingestion", tags=["ingestion"])
 settings = get_settings()
 
-# In-memory job tracking (would use Redis in production)
-_jobs: dict[str, JobStatus] = {}
-
-UPLOAD_DIR = Path("/app/uploads")
+UPLOAD_DIR = Path(settings.upload_dir)
+COPY_BUFFER_SIZE = 1 << 20  # 1 MiB: fewer read/write calls on multi-MB PDFs
 
 
 def get_file_hash(file_path: Path) -> str:
     """Calculate SHA-256 hash of file."""
-    sha256 = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().hexdigest()  # empty files cannot be mapped
+        # Hash the page-cache mapping directly: no copies into a user-space buffer
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+            return hashlib.sha256(mm).hexdigest()
+
+
+# Hashing/copying threads for folder ingestion: both are disk + C-level work outside the GIL
+_file_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix="ingest")
+
+
+async def _map_in_file_pool(fn, *iterables) -> list:
+    """Run fn over the zipped iterables on the file pool, results in order."""
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(loop.run_in_executor(_file_executor, fn, *args) for args in zip(*iterables)))
+
+
+# Source hashes by (path, mtime_ns, size): re-scans of an unchanged folder skip the SHA-256 pass
+_hash_cache: LRUCache = LRUCache(maxsize=16384)
+
+
+def copy_with_hash(src, dest: Path) -> str:
+    """Copy a binary file object to dest, computing its SHA-256 in the same pass."""
+    sha256 = hashlib.sha256()
+    with open(dest, "wb") as f:
+        while chunk := src.read(COPY_BUFFER_SIZE):
             sha256.update(chunk)
+            f.write(chunk)
     return sha256.hexdigest()
 
 
+async def _existing_hashes(db: AsyncSession, tenant_id: UUID, hashes) -> set[str]:
+    """Hashes already stored for the tenant, in a single IN query."""
+    if not hashes:
+        return set()
+    result = await db.scalars(
+        select(Document.file_hash).where(
+            Document.tenant_id == tenant_id,
+            Document.file_hash.in_(set(hashes))
+        )
+    )
+    return set(result)
+
+
+async def _existing_sizes(db: AsyncSession, tenant_id: UUID, sizes) -> set[int]:
+    """File sizes already stored for the tenant, in a single IN query."""
+    if not sizes:
+        return set()
+    result = await db.scalars(
+        select(Document.file_size_bytes).distinct().where(
+            Document.tenant_id == tenant_id,
+            Document.file_size_bytes.in_(set(sizes))
+        )
+    )
+    return set(result)
+
+
+FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+
+
+def _fastcopy(src: Path, dest: Path) -> None:
+    """Copy src to dest in the kernel where possible: reflink, then copy_file_range, then a buffered copy."""
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+        try:
+            # Copy-on-write clone on btrfs/xfs: metadata only
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except OSError:
+                # e.g. cross-device on older kernels
+                fdst.seek(0)
+                fdst.truncate()
+                fsrc.seek(0)
+                shutil.copyfileobj(fsrc, fdst, COPY_BUFFER_SIZE)
+    shutil.copystat(src, dest)
+
+
+def _copy_pdf(src: Path, dest: Path, file_hash: str | None) -> str:
+    """Copy src to dest; hash it during the copy when the hash is not known yet."""
+    if file_hash:
+        _fastcopy(src, dest)
+        return file_hash
+    with open(src, "rb") as f:
+        return copy_with_hash(f, dest)
+
+
 def is_path_allowed(path: str) -> bool:
     """Check if path is in allowed list (prevent path traversal)."""
     if not settings.allowed_upload_paths:
@@ -53,8 +150,8 @@ def is_path_allowed(path: str) -> bool:
 @router.post("/upload", response_model=JobStatus)
 async def upload_files(
     files: List[UploadFile] = File(...),
-    current_user: User = Depends(require_role(UserRole.ADMIN, UserRole.OPERATORE)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_operator),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload multiple PDF files for processing."""
     job_id = str(uuid4())
@@ -64,13 +161,14 @@ async def upload_files(
         total=len(files),
         progress=0
     )
-    _jobs[job_id] = job
+    await set_cached_job(job_id, job.model_dump_json())
     
     UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
     tenant_dir = UPLOAD_DIR / str(current_user.tenant_id)
     tenant_dir.mkdir(exist_ok=True)
     
     documents_created = []
+    staged = []
     
     for i, file in enumerate(files):
         filename = file.filename.lower()
@@ -87,14 +185,18 @@ async def upload_files(
         
         try:
             if is_image:
-                from PIL import Image
                 # Reset file pointer
                 file.file.seek(0)
                 img = Image.open(file.file)
                 if img.mode != 'RGB':
                     img = img.convert('RGB')
-                img.save(file_path, "PDF", resolution=150.0)
-                size = file_path.stat().st_size
+                # Converted bytes are in memory: hash them before writing, no read-back
+                buffer = io.BytesIO()
+                img.save(buffer, "PDF", resolution=150.0)
+                data = buffer.getbuffer()  # view, no copy of the encoded PDF
+                file_path.write_bytes(data)
+                size = len(data)
+                file_hash = hashlib.sha256(data).hexdigest()
             else:
                 # Is PDF
                 file.file.seek(0, 2)
@@ -105,24 +207,22 @@ async def upload_files(
                     job.message = f"File too large: {file.filename}"
                     continue
                     
-                with open(file_path, "wb") as f:
-                    shutil.copyfileobj(file.file, f)
+                file_hash = copy_with_hash(file.file, file_path)
         except Exception as e:
             job.message = f"Error processing {file.filename}: {e}"
             continue
         
-        file_hash = get_file_hash(file_path)
-        
-        # Check for duplicates
-        existing = db.query(Document).filter(
-            Document.tenant_id == current_user.tenant_id,
-            Document.file_hash == file_hash
-        ).first()
-        
-        if existing:
+        staged.append((i, file, file_id, file_path, file_hash, size))
+    
+    # Check for duplicates: one lookup for the whole batch
+    existing = await _existing_hashes(db, current_user.tenant_id, [entry[4] for entry in staged])
+    
+    for i, file, file_id, file_path, file_hash, size in staged:
+        if file_hash in existing:
             os.remove(file_path)
             job.message = f"Duplicate skipped: {file.filename}"
             continue
+        existing.add(file_hash)
         
         # Create document record
         doc = Document(
@@ -139,16 +239,17 @@ async def upload_files(
         
         job.progress = i + 1
     
-    db.commit()
+    await db.commit()
+    await invalidate_dashboard(current_user.tenant_id)
     
     job.status = "completed"
     job.documents_created = documents_created
     job.message = f"Created {len(documents_created)} documents"
     
+    await set_cached_job(job_id, job.model_dump_json())
+    
     # Trigger async processing via Celery
-    from app.workers.tasks import process_document
-    for doc_id in documents_created:
-        process_document.delay(str(doc_id))
+    enqueue(PROCESS_DOCUMENT, *documents_created)
     
     return job
 
@@ -156,8 +257,8 @@ async def upload_files(
 @router.post("/folder", response_model=JobStatus)
 async def ingest_folder(
     folder_path: str = Form(...),
-    current_user: User = Depends(require_role(UserRole.ADMIN, UserRole.OPERATORE)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_operator),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Ingest documents from a server folder path."""
     if not is_path_allowed(folder_path):
@@ -179,7 +280,7 @@ async def ingest_folder(
         total=len(pdf_files),
         progress=0
     )
-    _jobs[job_id] = job
+    await set_cached_job(job_id, job.model_dump_json())
     
     UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
     tenant_dir = UPLOAD_DIR / str(current_user.tenant_id)
@@ -187,30 +288,48 @@ async def ingest_folder(
     
     documents_created = []
     
-    for i, pdf_path in enumerate(pdf_files):
-        size = pdf_path.stat().st_size
-        if size > settings.max_file_size_mb * 1024 * 1024:
-            continue
-        
-        file_hash = get_file_hash(pdf_path)
-        
-        # Check for duplicates
-        existing = db.query(Document).filter(
-            Document.tenant_id == current_user.tenant_id,
-            Document.file_hash == file_hash
-        ).first()
-        
-        if existing:
+    max_size = settings.max_file_size_mb * 1024 * 1024
+    stats = {path: path.stat() for path in pdf_files}
+    hash_keys = {path: (str(path), st.st_mtime_ns, st.st_size) for path, st in stats.items()}
+    sized = [(path, st.st_size) for path, st in stats.items() if st.st_size <= max_size]
+    
+    # Size prefilter: a file can only be a duplicate if another file (stored or
+    # in this batch) has the same size; only those need hashing up front
+    size_counts = Counter(size for _, size in sized)
+    known_sizes = await _existing_sizes(db, current_user.tenant_id, size_counts)
+    candidates, new_files = [], []
+    for path, size in sized:
+        if size in known_sizes or size_counts[size] > 1:
+            candidates.append((path, size))
+        else:
+            new_files.append((path, size, _hash_cache.get(hash_keys[path])))
+    
+    # Hash uncached candidates concurrently (hashlib releases the GIL), off the event loop
+    hashes = [_hash_cache.get(hash_keys[path]) for path, _ in candidates]
+    missing = [i for i, file_hash in enumerate(hashes) if file_hash is None]
+    computed = await _map_in_file_pool(get_file_hash, [candidates[i][0] for i in missing])
+    for i, file_hash in zip(missing, computed):
+        hashes[i] = _hash_cache[hash_keys[candidates[i][0]]] = file_hash
+    
+    # Check for duplicates: one lookup for the whole batch
+    existing = await _existing_hashes(db, current_user.tenant_id, hashes)
+    for (pdf_path, size), file_hash in zip(candidates, hashes):
+        if file_hash in existing:
             continue
-        
-        # Copy file to upload dir
-        file_id = uuid4()
-        dest_path = tenant_dir / f"{file_id}.pdf"
-        shutil.copy2(pdf_path, dest_path)
-        
+        existing.add(file_hash)
+        new_files.append((pdf_path, size, file_hash))
+    
+    # Copy files to upload dir in parallel; size-unique files are hashed during the copy
+    dest_paths = [tenant_dir / f"{uuid4()}.pdf" for _ in new_files]
+    hashes = await _map_in_file_pool(
+        _copy_pdf, [f[0] for f in new_files], dest_paths, [f[2] for f in new_files]
+    )
+    
+    for (pdf_path, size, _), dest_path, file_hash in zip(new_files, dest_paths, hashes):
+        _hash_cache[hash_keys[pdf_path]] = file_hash
         # Create document record
         doc = Document(
-            id=file_id,
+            id=UUID(dest_path.stem),
             tenant_id=current_user.tenant_id,
             filename=pdf_path.name,
             file_path=str(dest_path),
@@ -220,19 +339,20 @@ async def ingest_folder(
         )
         db.add(doc)
         documents_created.append(doc.id)
-        
-        job.progress = i + 1
     
-    db.commit()
+    job.progress = len(pdf_files)
+    
+    await db.commit()
+    await invalidate_dashboard(current_user.tenant_id)
     
     job.status = "completed"
     job.documents_created = documents_created
     job.message = f"Created {len(documents_created)} documents from folder"
     
+    await set_cached_job(job_id, job.model_dump_json())
+    
     # Trigger async processing
-    from app.workers.tasks import process_document
-    for doc_id in documents_created:
-        process_document.delay(str(doc_id))
+    enqueue(PROCESS_DOCUMENT, *documents_created)
     
     return job
 
@@ -243,42 +363,45 @@ async def get_job_status(
     current_user: User = Depends(get_current_user)
 ):
     """Get ingestion job status."""
-    job = _jobs.get(job_id)
-    if not job:
+    payload = await get_cached_job(job_id)
+    if not payload:
         raise HTTPException(status_code=404, detail="Job not found")
-    return job
+    return JobStatus.model_validate_json(payload)
 
 
 @router.post("/reprocess/{document_id}")
 async def reprocess_document(
     document_id: UUID,
-    current_user: User = Depends(require_role(UserRole.ADMIN, UserRole.OPERATORE)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_operator),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Re-process a document with updated extraction logic."""
-    from app.models.extraction import ExtractedField, DocumentLine
-    
-    doc = db.query(Document).filter(
-        Document.id == document_id,
-        Document.tenant_id == current_user.tenant_id
-    ).first()
+    doc = await db.scalar(
+        select(Document).where(
+            Document.id == document_id,
+            Document.tenant_id == current_user.tenant_id
+        )
+    )
     
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # Delete existing fields and lines
-    db.query(ExtractedField).filter(ExtractedField.document_id == document_id).delete()
-    db.query(DocumentLine).filter(DocumentLine.document_id == document_id).delete()
+    # Delete existing fields and lines in one statement (field events cascade)
+    clear_fields = delete(ExtractedField).where(ExtractedField.document_id == document_id).cte("clear_fields")
+    await db.execute(
+        delete(DocumentLine).where(DocumentLine.document_id == document_id).add_cte(clear_fields),
+        execution_options={"synchronize_session": False},
+    )
     
     # Reset document metadata
     doc.doc_number = None
     doc.doc_date = None
     doc.status = DocumentStatus.QUEUED
     
-    db.commit()
+    await db.commit()
+    await invalidate_dashboard(current_user.tenant_id)
     
     # Trigger reprocessing
-    from app.workers.tasks import process_document
-    process_document.delay(str(document_id))
+    enqueue(PROCESS_DOCUMENT, document_id, force=True)
     
     return {"message": f"Document {doc.filename} queued for reprocessing", "document_id": str(document_id)}
@@ -58,7 +58,7 @@ class FieldEventRead(BaseModel):
     """Field event response (audit trail)."""
     id: UUID
     field_id: UUID
-    user_id: UUID
+    user_id: UUID | None = None  # None once the user has been deleted
     event_type: FieldEventType
     old_value: str | None = None
     new_value: str | None = None
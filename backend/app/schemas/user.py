@@ -23,14 +23,14 @@ class UserUpdate(BaseModel):
     full_name: str | None = None
     role: str | None = None
     password: str | None = None
-    is_active: str | None = None
+    is_active: bool | None = None
 
 
 class UserRead(UserBase):
     """User response."""
     id: UUID
     tenant_id: UUID
-    is_active: str
+    is_active: bool
     created_at: datetime
     
     model_config = ConfigDict(from_attributes=True)
@@ -52,7 +52,7 @@ class BIService:
         """Use LLM to generate SQL query from natural language."""
         
         schema_desc = """
-Table: v_reporting_documents
+Table: mv_reporting_documents
 Columns:
 - document_id (uuid): Unique ID
 - filename (text): Name of the file
@@ -80,7 +80,7 @@ SCHEMA:
 
 RULES:
 1. Return ONLY the raw SQL query. No markdown formatting, no explanations.
-2. Use ONLY the table `v_reporting_documents`.
+2. Use ONLY the table `mv_reporting_documents`.
 3. Use `ILIKE` for case-insensitive text matching.
 4. For amounts, use `SUM(total_amount)`, `AVG(...)` etc.
 5. If referring to dates, use `doc_year` and `doc_month` when convenient, or standard PostgreSQL date functions on `document_date`.
@@ -4,10 +4,9 @@ import re
 from dataclasses import dataclass
 from typing import Optional
 
-import httpx
-
 from app.config import get_settings
 from app.models.document import DocumentType
+from app.services.ollama import get_ollama_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -99,6 +98,30 @@ CLASSIFICATION_RULES = {
     }
 }
 
+# Flattened once, in priority order: (doc_type, keywords, compiled patterns, negative keywords).
+# Patterns run against the lowercased text.
+_COMPILED_RULES = tuple(
+    (
+        doc_type,
+        tuple(rules["keywords"]),
+        tuple(re.compile(p) for p in rules["patterns"]),
+        tuple(rules.get("negative_keywords", [])),
+    )
+    for doc_type, rules in sorted(CLASSIFICATION_RULES.items(), key=lambda x: x[1]["priority"])
+)
+
+
+# All keywords (positive and negative), deduplicated across rules
+_KEYWORDS = frozenset(
+    kw for rules in CLASSIFICATION_RULES.values()
+    for kw in rules["keywords"] + rules.get("negative_keywords", [])
+)
+
+
+def find_keywords(text_lower: str) -> set[str]:
+    """Return the classification keywords occurring in text_lower, each searched once."""
+    return {kw for kw in _KEYWORDS if kw in text_lower}
+
 
 def classify_by_rules(text: str, filename: str = "") -> ClassificationResult | None:
     """Classify document using rule-based keywords and patterns."""
@@ -122,12 +145,10 @@ def classify_by_rules(text: str, filename: str = "") -> ClassificationResult | N
         if filename_match:
             break
     
+    found_keywords = find_keywords(text_lower)
     scores: dict[str, tuple[float, list[str]]] = {}
     
-    # Sort rules by priority
-    sorted_rules = sorted(CLASSIFICATION_RULES.items(), key=lambda x: x[1]["priority"])
-    
-    for doc_type, rules in sorted_rules:
+    for doc_type, keywords, patterns, negative_keywords in _COMPILED_RULES:
         score = 0.0
         evidence = []
         
@@ -137,21 +158,21 @@ def classify_by_rules(text: str, filename: str = "") -> ClassificationResult | N
             evidence.append(f"filename hint: {filename_lower}")
         
         # Check keywords
-        for keyword in rules["keywords"]:
-            if keyword in text_lower:
+        for keyword in keywords:
+            if keyword in found_keywords:
                 score += 1.0
                 evidence.append(f"keyword: {keyword}")
         
         # Check patterns (more specific = higher score)
-        for pattern in rules["patterns"]:
-            matches = re.findall(pattern, text_lower)
-            if matches:
+        for pattern in patterns:
+            match = pattern.search(text_lower)
+            if match:
                 score += 2.5
-                evidence.append(f"pattern: {matches[0][:30]}")
+                evidence.append(f"pattern: {match.group(0)[:30]}")
         
         # Negative keywords reduce score
-        for neg_kw in rules.get("negative_keywords", []):
-            if neg_kw in text_lower:
+        for neg_kw in negative_keywords:
+            if neg_kw in found_keywords:
                 score -= 0.5
         
         if score > 0:
@@ -218,43 +239,44 @@ CATEGORIA: [motivazione breve]
 Esempio: PREVENTIVO: contiene "Offerta n." e condizioni di validità"""
 
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(
-                f"{settings.ollama_base_url}/api/generate",
-                json={
-                    "model": settings.ollama_chat_model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {"temperature": 0.1}
-                }
-            )
-            
-            if response.status_code != 200:
-                logger.warning(f"Ollama returned {response.status_code}")
-                return None
-            
-            result = response.json()
-            answer = result.get("response", "").strip().upper()
-            
-            # Parse response
-            if "PREVENTIVO" in answer:
-                doc_type = "preventivo"
-            elif "DDT" in answer or "TRASPORTO" in answer or "BOLLA" in answer:
-                doc_type = "ddt"
-            elif "FATTURA" in answer or "INVOICE" in answer:
-                doc_type = "fattura"
-            elif "PO" in answer or "ORDINE" in answer:
-                doc_type = "po"
-            else:
-                doc_type = "altro"
-            
-            return ClassificationResult(
-                doc_type=doc_type,
-                confidence=0.8,
-                method="llm",
-                evidence=[answer[:100]]
-            )
-            
+        client = get_ollama_client()
+        response = await client.post(
+            "/api/generate",
+            json={
+                "model": settings.ollama_chat_model,
+                "prompt": prompt,
+                "stream": False,
+                "options": {"temperature": 0.1}
+            },
+            timeout=30
+        )
+        
+        if response.status_code != 200:
+            logger.warning(f"Ollama returned {response.status_code}")
+            return None
+        
+        result = response.json()
+        answer = result.get("response", "").strip().upper()
+        
+        # Parse response
+        if "PREVENTIVO" in answer:
+            doc_type = "preventivo"
+        elif "DDT" in answer or "TRASPORTO" in answer or "BOLLA" in answer:
+            doc_type = "ddt"
+        elif "FATTURA" in answer or "INVOICE" in answer:
+            doc_type = "fattura"
+        elif "PO" in answer or "ORDINE" in answer:
+            doc_type = "po"
+        else:
+            doc_type = "altro"
+        
+        return ClassificationResult(
+            doc_type=doc_type,
+            confidence=0.8,
+            method="llm",
+            evidence=[answer[:100]]
+        )
+        
     except Exception as e:
         logger.error(f"LLM classification error: {e}")
         return None
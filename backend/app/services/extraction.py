@@ -4,6 +4,7 @@ from pathlib import Path
 from dataclasses import dataclass
 
 import fitz  # PyMuPDF
+from PIL import Image
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +39,6 @@ def extract_text_from_pdf(file_path: str | Path) -> ExtractionResult:
     file_path = Path(file_path)
     pages: list[PageContent] = []
     warnings: list[str] = []
-    all_text: list[str] = []
     
     pages_with_text = 0
     pages_with_images = 0
@@ -48,42 +48,40 @@ def extract_text_from_pdf(file_path: str | Path) -> ExtractionResult:
         total_pages = len(doc)
         
         for page_num in range(total_pages):
-            page = doc[page_num]
-            
             # Extract text
-            text = page.get_text("text").strip()
-            
-            # Count images
-            image_list = page.get_images(full=True)
-            image_count = len(image_list)
+            text = doc[page_num].get_text("text").strip()
             
             has_text = len(text) > 20  # Minimal threshold
             
             if has_text:
                 pages_with_text += 1
-            if image_count > 0:
-                pages_with_images += 1
             
             pages.append(PageContent(
                 page_number=page_num + 1,
                 text=text,
                 has_text_layer=has_text,
-                image_count=image_count
+                image_count=0
             ))
-            all_text.append(text)
-        
-        doc.close()
         
         # Determine if scanned
-        # If less than 50% of pages have text and most have images, likely scanned
+        # If less than 50% of pages have text and most have images, likely scanned.
+        # Images only matter for the second condition: text-rich documents skip the enumeration.
         text_ratio = pages_with_text / total_pages if total_pages > 0 else 0
+        if text_ratio < 0.5:
+            for page in pages:
+                page.image_count = len(doc[page.page_number - 1].get_images(full=True))
+                if page.image_count > 0:
+                    pages_with_images += 1
+        
+        doc.close()
+        
         is_scanned = text_ratio < 0.5 and pages_with_images >= total_pages * 0.7
         
         if is_scanned:
             warnings.append("Document appears to be scanned (minimal text layer)")
         
         return ExtractionResult(
-            raw_text="\n\n".join(all_text),
+            raw_text="\n\n".join(page.text for page in pages),
             pages=pages,
             is_scanned=is_scanned,
             total_pages=total_pages,
@@ -103,9 +101,6 @@ def extract_text_from_pdf(file_path: str | Path) -> ExtractionResult:
 
 def get_page_as_image(file_path: str | Path, page_number: int, dpi: int = 300):
     """Render a PDF page as an image for OCR."""
-    from PIL import Image
-    import io
-    
     doc = fitz.open(file_path)
     page = doc[page_number - 1]  # 0-indexed
     
@@ -114,9 +109,29 @@ def get_page_as_image(file_path: str | Path, page_number: int, dpi: int = 300):
     matrix = fitz.Matrix(zoom, zoom)
     pix = page.get_pixmap(matrix=matrix)
     
-    # Convert to PIL Image
-    img_data = pix.tobytes("png")
-    image = Image.open(io.BytesIO(img_data))
+    # Wrap the raw samples directly: no PNG encode/decode round-trip
+    image = Image.frombytes("RGBA" if pix.alpha else "RGB", (pix.width, pix.height), pix.samples)
     
     doc.close()
     return image
+
+
+def render_page_jpeg(file_path: str | Path, page_number: int, dpi: int = 150,
+                     rotation: int = 0, quality: int = 85) -> bytes:
+    """Render a PDF page straight to JPEG bytes, rotated clockwise by `rotation` degrees."""
+    doc = fitz.open(file_path)
+    try:
+        page = doc[page_number - 1]  # 0-indexed
+        zoom = dpi / 72
+        # Rotation folded into the render matrix: no PNG round-trip, no PIL rotate
+        matrix = fitz.Matrix(zoom, zoom).prerotate(rotation)
+        pix = page.get_pixmap(matrix=matrix)
+        return pix.tobytes("jpg", jpg_quality=quality)
+    finally:
+        doc.close()
+
+
+def count_pages(file_path: str | Path) -> int:
+    """Number of pages in a PDF."""
+    with fitz.open(file_path) as doc:
+        return len(doc)
@@ -1,4 +1,6 @@
 """Meta-tagging service for structured field extraction with semantic understanding."""
+import copy
+import hashlib
 import re
 import json
 import logging
@@ -6,13 +8,33 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-import httpx
+from cachetools import LRUCache
 
 from app.config import get_settings
+from app.services.ollama import get_ollama_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Compiled once: validators and the rules fallback run for every field of every document
+_NONALNUM_RE = re.compile(r'[^A-Z0-9]')
+_HAS_DIGIT_RE = re.compile(r'\d')
+_WS_RE = re.compile(r'\s+')
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+_PIVA_RE = re.compile(r'(?:p\.?\s*iva|partita\s*iva)[:\s]*(\d{11})')
+_DATE_RE = re.compile(r'(?:data\s*(?:fattura|documento|ddt|ordine)?)[:\s]*(\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4})')
+_DOCNUM_RE = re.compile(r'(?:fattura|ddt|ordine|bolla)\s*(?:n[°.:\s]|nr\.?\s*)([A-Z0-9/-]{2,20})', re.IGNORECASE)
+
+# normalize_amount: translate tables instead of regex + chained replace(). The whitespace set
+# is str.isspace() (what \s matches), including the NBSPs used as thousands separators in PDFs.
+_STRIP_TABLE = dict.fromkeys(map(ord, "€$\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680"
+                                     "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+                                     "\u2028\u2029\u202f\u205f\u3000"))
+_ITALIAN_TABLE = str.maketrans({'.': None, ',': '.'})
+_DROP_COMMA_TABLE = str.maketrans('', '', ',')
+_DROP_DOT_TABLE = str.maketrans('', '', '.')
+_COMMA_TO_DOT_TABLE = str.maketrans(',', '.')
+
 
 @dataclass
 class ExtractedFieldResult:
@@ -33,20 +55,37 @@ class ExtractionOutput:
     warnings: list[str]
 
 
+DATE_FORMATS = (
+    "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y",
+    "%d/%m/%y", "%d-%m-%y", "%d.%m.%y",
+    "%Y-%m-%d",  # Already ISO
+)
+_DATE_FORMAT_ORDER = {fmt: (fmt, *(f for f in DATE_FORMATS if f != fmt)) for fmt in DATE_FORMATS}
+
+
+def _guess_date_format(value: str) -> str | None:
+    """The single format that can match value, from its separator and year length."""
+    if len(value) == 10 and value[4] == '-':
+        return "%Y-%m-%d"
+    sep = next((c for c in "/-." if c in value), None)
+    if sep is None:
+        return None
+    year = value.rsplit(sep, 1)[-1]
+    return f"%d{sep}%m{sep}%Y" if len(year) == 4 else f"%d{sep}%m{sep}%y"
+
+
 def normalize_date(date_str: str) -> str | None:
     """Normalize date string to ISO format."""
     if not date_str:
         return None
         
-    formats = [
-        "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y",
-        "%d/%m/%y", "%d-%m-%y", "%d.%m.%y",
-        "%Y-%m-%d",  # Already ISO
-    ]
+    value = date_str.strip()
     
-    for fmt in formats:
+    # The formats are mutually exclusive: try the one the separator and year length point to,
+    # the others only as a fallback
+    for fmt in _DATE_FORMAT_ORDER.get(_guess_date_format(value), DATE_FORMATS):
         try:
-            dt = datetime.strptime(date_str.strip(), fmt)
+            dt = datetime.strptime(value, fmt)
             if dt.year < 100:
                 dt = dt.replace(year=dt.year + 2000)
             return dt.strftime("%Y-%m-%d")
@@ -67,44 +106,36 @@ def normalize_amount(amount_str: str) -> str | None:
         return None
     
     # Remove currency symbols and whitespace
-    cleaned = re.sub(r'[€$\s]', '', str(amount_str))
+    cleaned = str(amount_str).translate(_STRIP_TABLE)
     
     if not cleaned:
         return None
     
-    # Detect format: if both . and , are present, determine which is decimal
-    has_dot = '.' in cleaned
-    has_comma = ',' in cleaned
+    # Detect format: if both . and , are present, the last one is the decimal separator
+    dot_pos = cleaned.rfind('.')
+    comma_pos = cleaned.rfind(',')
     
-    if has_comma and has_dot:
-        # Both present: comma after dot = Italian (1.234,56)
-        dot_pos = cleaned.rfind('.')
-        comma_pos = cleaned.rfind(',')
+    if comma_pos >= 0 and dot_pos >= 0:
         if comma_pos > dot_pos:
             # Italian format: 1.234,56
-            cleaned = cleaned.replace('.', '').replace(',', '.')
+            cleaned = cleaned.translate(_ITALIAN_TABLE)
         else:
             # English format with comma as thousands: 1,234.56
-            cleaned = cleaned.replace(',', '')
-    elif has_comma:
+            cleaned = cleaned.translate(_DROP_COMMA_TABLE)
+    elif comma_pos >= 0:
         # Only comma: check if it's decimal (X,XX) or thousands (X,XXX)
-        parts = cleaned.split(',')
-        if len(parts) == 2 and len(parts[1]) <= 2:
+        if cleaned.count(',') == 1 and len(cleaned) - comma_pos - 1 <= 2:
             # Decimal comma: 123,45
-            cleaned = cleaned.replace(',', '.')
+            cleaned = cleaned.translate(_COMMA_TO_DOT_TABLE)
         else:
             # Thousands comma: 1,234
-            cleaned = cleaned.replace(',', '')
+            cleaned = cleaned.translate(_DROP_COMMA_TABLE)
     # If only dot: it's either decimal (123.45) or Italian thousands (1.234)
-    elif has_dot:
-        parts = cleaned.split('.')
-        if len(parts) == 2 and len(parts[1]) == 2:
-            # Decimal dot: 123.45 - keep as is
-            pass
-        elif len(parts) == 2 and len(parts[1]) == 3:
+    elif dot_pos >= 0:
+        if cleaned.count('.') == 1 and len(cleaned) - dot_pos - 1 == 3:
             # Italian thousands without decimals: 1.234 = 1234
-            cleaned = cleaned.replace('.', '')
-        # Otherwise keep as is (assume decimal)
+            cleaned = cleaned.translate(_DROP_DOT_TABLE)
+        # Otherwise keep as is (decimal dot: 123.45)
     
     try:
         value = float(cleaned)
@@ -118,7 +149,7 @@ def validate_partita_iva(value: str) -> str | None:
     """Validate Italian Partita IVA (11 digits) or Codice Fiscale (16 chars)."""
     if not value:
         return None
-    cleaned = re.sub(r'[^A-Z0-9]', '', value.upper().strip())
+    cleaned = _NONALNUM_RE.sub('', value.upper().strip())
     
     # Valid if 11 digits (P.IVA) or 16 alphanumeric (CF)
     if len(cleaned) == 11 and cleaned.isdigit():
@@ -136,11 +167,11 @@ def validate_doc_number(value: str) -> str | None:
     cleaned = value.strip()
     
     # Must contain at least one digit to be a document number
-    if not re.search(r'\d', cleaned):
+    if not _HAS_DIGIT_RE.search(cleaned):
         return None
     
     # Remove excessive whitespace
-    cleaned = re.sub(r'\s+', ' ', cleaned)
+    cleaned = _WS_RE.sub(' ', cleaned)
     
     # Should be reasonably short (document numbers are typically < 25 chars)
     if len(cleaned) < 2 or len(cleaned) > 25:
@@ -149,6 +180,58 @@ def validate_doc_number(value: str) -> str | None:
     return cleaned.upper()
 
 
+# Static extraction instructions, sent as the system message of every /api/chat call:
+# Ollama keeps this prefix in the KV cache, so only the document text is prefilled per call
+SYSTEM_PROMPT = """Sei un esperto estrattore di dati da documenti aziendali italiani.
+Estrai SOLO i dati effettivamente presenti nel documento.
+
+REGOLE IMPORTANTI:
+1. "numero_documento": Cerca esplicitamente "Fattura N.", "DDT N.", "Ordine N.", "Nr.", "N°". 
+   DEVE essere un codice/numero breve (es: "2024/001", "FT-123", "A00001"). 
+   NON mettere indirizzi, nomi o descrizioni come numero documento.
+   Se non trovi un numero documento chiaro, metti null.
+
+2. "data_documento": La data del documento (es: data fattura, data DDT). 
+   Formato: DD/MM/YYYY o simile. Converti in YYYY-MM-DD.
+
+3. "partita_iva": P.IVA (11 cifre) o Codice Fiscale (16 caratteri). 
+   Cerca "P.IVA", "Partita IVA", "C.F.". Solo numeri/lettere.
+
+4. "emittente": L'azienda che HA EMESSO il documento (chi lo ha creato/inviato).
+   Di solito è in alto a sinistra, con logo, indirizzo completo, P.IVA, telefono.
+   Solo il nome dell'azienda, non l'indirizzo.
+
+5. "destinatario": L'azienda a cui è destinato il documento (chi lo riceve).
+   Di solito sotto "DESTINATARIO", "SPETT.LE", "Cliente".
+   Solo il nome dell'azienda, non l'indirizzo.
+
+6. "totale": Importo totale finale. Solo numeri e decimali.
+
+Il messaggio dell'utente può aggiungere regole (7, 8, ...) e campi specifici per il tipo di documento.
+
+RIGHE ARTICOLO:
+"righe_articolo": Array di oggetti con: codice, descrizione, quantita, prezzo_unitario.
+   - Le colonne tipiche sono: CODICE | DESCRIZIONE | UM | QUANTITA | PREZZO | SCONTO | IMPORTO
+   - ATTENZIONE: Il valore dopo "N" o "PZ" è la QUANTITA.
+   - OGNI RIGA ha la SUA quantità. Non copiare valori.
+
+IMPORTANTE: Se un campo non è chiaramente identificabile, usa null.
+
+Rispondi SOLO con JSON valido:
+
+{
+  "numero_documento": "...", 
+  "data_documento": "YYYY-MM-DD",
+  "partita_iva": "...",
+  "emittente": "...",
+  "destinatario": "...",
+  "totale": "1234.56",
+  "righe_articolo": [
+    {"codice": "...", "descrizione": "...", "quantita": 5.0, "prezzo_unitario": 99.00}
+  ]
+}"""
+
+
 async def extract_with_llm_semantic(text: str, doc_type: str) -> dict:
     """
     Use LLM to semantically interpret the document and extract structured data.
@@ -199,54 +282,15 @@ async def extract_with_llm_semantic(text: str, doc_type: str) -> dict:
 """
         type_specific_json = '"data_consegna": "YYYY-MM-DD", "indirizzo_consegna": "...",'
     
-    prompt = f"""Sei un esperto estrattore di dati da documenti aziendali italiani.
-Analizza questo {doc_type_desc} ed estrai SOLO i dati effettivamente presenti.
-
-REGOLE IMPORTANTI:
-1. "numero_documento": Cerca esplicitamente "Fattura N.", "DDT N.", "Ordine N.", "Nr.", "N°". 
-   DEVE essere un codice/numero breve (es: "2024/001", "FT-123", "A00001"). 
-   NON mettere indirizzi, nomi o descrizioni come numero documento.
-   Se non trovi un numero documento chiaro, metti null.
-
-2. "data_documento": La data del documento (es: data fattura, data DDT). 
-   Formato: DD/MM/YYYY o simile. Converti in YYYY-MM-DD.
-
-3. "partita_iva": P.IVA (11 cifre) o Codice Fiscale (16 caratteri). 
-   Cerca "P.IVA", "Partita IVA", "C.F.". Solo numeri/lettere.
-
-4. "emittente": L'azienda che HA EMESSO il documento (chi lo ha creato/inviato).
-   Di solito è in alto a sinistra, con logo, indirizzo completo, P.IVA, telefono.
-   Solo il nome dell'azienda, non l'indirizzo.
-
-5. "destinatario": L'azienda a cui è destinato il documento (chi lo riceve).
-   Di solito sotto "DESTINATARIO", "SPETT.LE", "Cliente".
-   Solo il nome dell'azienda, non l'indirizzo.
-
-6. "totale": Importo totale finale. Solo numeri e decimali.
-{type_specific_rules}
-RIGHE ARTICOLO:
-"righe_articolo": Array di oggetti con: codice, descrizione, quantita, prezzo_unitario.
-   - Le colonne tipiche sono: CODICE | DESCRIZIONE | UM | QUANTITA | PREZZO | SCONTO | IMPORTO
-   - ATTENZIONE: Il valore dopo "N" o "PZ" è la QUANTITA.
-   - OGNI RIGA ha la SUA quantità. Non copiare valori.
-
-IMPORTANTE: Se un campo non è chiaramente identificabile, usa null.
-
-Rispondi SOLO con JSON valido:
-
-{{
-  "numero_documento": "...", 
-  "data_documento": "YYYY-MM-DD",
-  "partita_iva": "...",
-  "emittente": "...",
-  "destinatario": "...",
-  "totale": "1234.56",
-  {type_specific_json}
-  "righe_articolo": [
-    {{"codice": "...", "descrizione": "...", "quantita": 5.0, "prezzo_unitario": 99.00}}
-  ]
-}}
-
+    # Only the per-document part: the static rules are the cached system prefix
+    user_message = f"""Analizza questo {doc_type_desc} ed estrai SOLO i dati effettivamente presenti.
+{type_specific_rules}"""
+    if type_specific_json:
+        user_message += f"""
+Aggiungi al JSON anche questi campi:
+{{ {type_specific_json.rstrip(",")} }}
+"""
+    user_message += f"""
 TESTO DEL DOCUMENTO:
 ---
 {text[:6000]}
@@ -255,42 +299,47 @@ TESTO DEL DOCUMENTO:
 JSON:"""
 
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
-            response = await client.post(
-                f"{settings.ollama_base_url}/api/generate",
-                json={
-                    "model": settings.ollama_chat_model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.1,  # Low temperature for consistency
-                        "num_predict": 1000
-                    }
+        client = get_ollama_client()
+        response = await client.post(
+            "/api/chat",
+            json={
+                "model": settings.ollama_chat_model,
+                "messages": [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": user_message},
+                ],
+                "stream": False,
+                "keep_alive": "30m",  # keep the model (and its cached prefix) resident
+                "options": {
+                    "temperature": 0.1,  # Low temperature for consistency
+                    "num_predict": 1000
                 }
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"LLM extraction failed: {response.status_code}")
-                return {}
-            
-            result = response.json()
-            answer = result.get("response", "")
-            
-            # Extract JSON from response
-            # Try to find JSON block
-            json_match = re.search(r'\{.*\}', answer, re.DOTALL)
-            if json_match:
-                try:
-                    data = json.loads(json_match.group())
-                    logger.info(f"LLM extraction successful: {list(data.keys())}")
-                    return data
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse LLM JSON: {e}")
-                    logger.debug(f"Raw response: {answer[:500]}")
-            else:
-                logger.error("No JSON found in LLM response")
+            },
+            timeout=60
+        )
+        
+        if response.status_code != 200:
+            logger.error(f"LLM extraction failed: {response.status_code}")
+            return {}
+        
+        result = response.json()
+        answer = result.get("message", {}).get("content", "")
+        
+        # Extract JSON from response
+        # Try to find JSON block
+        json_match = _JSON_RE.search(answer)
+        if json_match:
+            try:
+                data = json.loads(json_match.group())
+                logger.info(f"LLM extraction successful: {list(data.keys())}")
+                return data
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse LLM JSON: {e}")
                 logger.debug(f"Raw response: {answer[:500]}")
-                    
+        else:
+            logger.error("No JSON found in LLM response")
+            logger.debug(f"Raw response: {answer[:500]}")
+                
     except Exception as e:
         logger.error(f"LLM extraction error: {e}")
     
@@ -306,7 +355,7 @@ def extract_by_rules_fallback(text: str) -> list[ExtractedFieldResult]:
     text_lower = text.lower()
     
     # P.IVA - very specific pattern
-    piva_match = re.search(r'(?:p\.?\s*iva|partita\s*iva)[:\s]*(\d{11})', text_lower)
+    piva_match = _PIVA_RE.search(text_lower)
     if piva_match:
         results.append(ExtractedFieldResult(
             field_name="partita_iva",
@@ -317,10 +366,7 @@ def extract_by_rules_fallback(text: str) -> list[ExtractedFieldResult]:
         ))
     
     # Date - look for explicit document date labels
-    date_match = re.search(
-        r'(?:data\s*(?:fattura|documento|ddt|ordine)?)[:\s]*(\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4})',
-        text_lower
-    )
+    date_match = _DATE_RE.search(text_lower)
     if date_match:
         normalized = normalize_date(date_match.group(1))
         results.append(ExtractedFieldResult(
@@ -332,17 +378,15 @@ def extract_by_rules_fallback(text: str) -> list[ExtractedFieldResult]:
         ))
     
     # Document number - look for explicit labels, must contain digits
-    doc_num_match = re.search(
-        r'(?:fattura|ddt|ordine|bolla)\s*(?:n[°.:\s]|nr\.?\s*)([A-Z0-9/-]{2,20})',
-        text_lower, re.IGNORECASE
-    )
+    doc_num_match = _DOCNUM_RE.search(text_lower)
     if doc_num_match:
         value = doc_num_match.group(1)
-        if validate_doc_number(value):
+        normalized = validate_doc_number(value)
+        if normalized:
             results.append(ExtractedFieldResult(
                 field_name="numero_documento",
                 raw_value=value,
-                normalized_value=validate_doc_number(value),
+                normalized_value=normalized,
                 confidence=0.6,
                 evidence_text=doc_num_match.group(0)
             ))
@@ -350,191 +394,105 @@ def extract_by_rules_fallback(text: str) -> list[ExtractedFieldResult]:
     return results
 
 
-async def extract_fields(text: str, page_texts: list[str] | None = None, doc_type: str = "unknown") -> ExtractionOutput:
+def _company_name(value: str) -> str | None:
+    """Title-cased company name; too-short answers are discarded."""
+    value = value.strip()
+    return value.title() if len(value) > 2 else None
+
+
+_SEMANTIC = "LLM semantic extraction"
+_TYPE_SPECIFIC = "LLM type-specific extraction"
+
+# LLM key -> (field name, confidence, normalizer, strip raw value, evidence,
+# warning when the normalizer rejects it). A normalizer returning None drops the field.
+_LLM_FIELD_SPECS = (
+    ("numero_documento", "numero_documento", 0.85, validate_doc_number, False, _SEMANTIC,
+     "Numero documento '{}' non valido (deve contenere cifre)"),
+    ("data_documento", "data_documento", 0.85, lambda v: normalize_date(v) or v, False, _SEMANTIC, None),
+    ("partita_iva", "partita_iva", 0.85, validate_partita_iva, False, _SEMANTIC, None),
+    ("emittente", "emittente", 0.85, _company_name, True, _SEMANTIC, None),
+    # Destinatario is stored in the fornitore column for compatibility
+    ("destinatario", "fornitore", 0.75, _company_name, True, _SEMANTIC, None),
+    ("totale", "totale", 0.8, normalize_amount, False, _SEMANTIC, None),
+    # DDT
+    ("vettore", "vettore", 0.75, str.strip, False, _TYPE_SPECIFIC, None),
+    ("causale_trasporto", "causale_trasporto", 0.75, str.strip, False, _TYPE_SPECIFIC, None),
+    # Fattura
+    ("imponibile", "imponibile", 0.75, normalize_amount, False, _TYPE_SPECIFIC, None),
+    ("aliquota_iva", "aliquota_iva", 0.75, str, False, _TYPE_SPECIFIC, None),
+    ("importo_iva", "importo_iva", 0.75, normalize_amount, False, _TYPE_SPECIFIC, None),
+    ("scadenza_pagamento", "scadenza_pagamento", 0.75, str.strip, False, _TYPE_SPECIFIC, None),
+    ("modalita_pagamento", "modalita_pagamento", 0.75, str.strip, False, _TYPE_SPECIFIC, None),
+    # Preventivo
+    ("validita_offerta", "validita_offerta", 0.70, str.strip, False, _TYPE_SPECIFIC, None),
+    # Ordine (PO)
+    ("data_consegna", "data_consegna", 0.75, str.strip, False, _TYPE_SPECIFIC, None),
+)
+
+
+# Parsed LLM answers by content: retries and re-runs on the same text skip the Ollama call
+_llm_cache: LRUCache = LRUCache(maxsize=512)
+
+
+def _llm_cache_key(text: str, doc_type: str) -> bytes:
+    # Same truncation as the prompt: only what the model actually sees matters
+    payload = f"{settings.ollama_chat_model}\x00{doc_type}\x00{text[:6000]}"
+    return hashlib.blake2b(payload.encode(), digest_size=16).digest()
+
+
+async def extract_with_llm_cached(text: str, doc_type: str, refresh: bool = False) -> dict:
+    """extract_with_llm_semantic memoized on (model, doc_type, text); failures are not cached.
+
+    refresh skips the cached answer and replaces it. Callers get a copy, never the cached dict.
+    """
+    key = _llm_cache_key(text, doc_type)
+    data = None if refresh else _llm_cache.get(key)
+    if data is None:
+        data = await extract_with_llm_semantic(text, doc_type)
+        if data:
+            _llm_cache[key] = copy.deepcopy(data)
+        return data
+    return copy.deepcopy(data)
+
+
+async def extract_fields(text: str, page_texts: list[str] | None = None, doc_type: str = "unknown",
+                         use_cache: bool = True) -> ExtractionOutput:
     """
     Extract structured fields from document text.
     
     Primary method: LLM-based semantic extraction
     Fallback: Rule-based for specific high-confidence patterns
+    
+    use_cache=False asks the LLM again (user reprocess) and refreshes the cached answer.
     """
     warnings = []
     fields = []
     lines = []
     
-    # Primary: LLM semantic extraction
-    llm_data = await extract_with_llm_semantic(text, doc_type)
+    # Primary: LLM semantic extraction (nothing to send for an empty text layer)
+    if not text.strip():
+        llm_data = {}
+    else:
+        llm_data = await extract_with_llm_cached(text, doc_type, refresh=not use_cache)
     
     if llm_data:
-        # Process LLM results with validation
-        
-        # Numero documento - validate
-        if llm_data.get("numero_documento"):
-            num = str(llm_data["numero_documento"])
-            validated = validate_doc_number(num)
-            if validated:
-                fields.append(ExtractedFieldResult(
-                    field_name="numero_documento",
-                    raw_value=num,
-                    normalized_value=validated,
-                    confidence=0.85,
-                    evidence_text="LLM semantic extraction"
-                ))
-            else:
-                warnings.append(f"Numero documento '{num}' non valido (deve contenere cifre)")
-        
-        # Data documento
-        if llm_data.get("data_documento"):
-            date_val = str(llm_data["data_documento"])
-            normalized = normalize_date(date_val)
-            fields.append(ExtractedFieldResult(
-                field_name="data_documento",
-                raw_value=date_val,
-                normalized_value=normalized or date_val,
-                confidence=0.85,
-                evidence_text="LLM semantic extraction"
-            ))
-        
-        # Partita IVA - validate
-        if llm_data.get("partita_iva"):
-            piva = str(llm_data["partita_iva"])
-            validated = validate_partita_iva(piva)
-            if validated:
-                fields.append(ExtractedFieldResult(
-                    field_name="partita_iva",
-                    raw_value=piva,
-                    normalized_value=validated,
-                    confidence=0.85,
-                    evidence_text="LLM semantic extraction"
-                ))
-        
-        # Emittente (who issued the document)
-        if llm_data.get("emittente"):
-            emittente = str(llm_data["emittente"]).strip()
-            if len(emittente) > 2:
-                fields.append(ExtractedFieldResult(
-                    field_name="emittente",
-                    raw_value=emittente,
-                    normalized_value=emittente.title(),
-                    confidence=0.85,
-                    evidence_text="LLM semantic extraction"
-                ))
-        
-        # Destinatario (who receives the document) - stored in fornitore for compatibility
-        if llm_data.get("destinatario"):
-            destinatario = str(llm_data["destinatario"]).strip()
-            if len(destinatario) > 2:
-                fields.append(ExtractedFieldResult(
-                    field_name="fornitore",  # Keep using fornitore column for destinatario
-                    raw_value=destinatario,
-                    normalized_value=destinatario.title(),
-                    confidence=0.75,
-                    evidence_text="LLM semantic extraction"
-                ))
-        
-        # Totale
-        if llm_data.get("totale"):
-            totale = str(llm_data["totale"])
-            normalized = normalize_amount(totale)
-            if normalized:
-                fields.append(ExtractedFieldResult(
-                    field_name="totale",
-                    raw_value=totale,
-                    normalized_value=normalized,
-                    confidence=0.8,
-                    evidence_text="LLM semantic extraction"
-                ))
-        
-        # Type-specific fields
-        
-        # DDT fields
-        if llm_data.get("vettore"):
-            fields.append(ExtractedFieldResult(
-                field_name="vettore",
-                raw_value=str(llm_data["vettore"]),
-                normalized_value=str(llm_data["vettore"]).strip(),
-                confidence=0.75,
-                evidence_text="LLM type-specific extraction"
-            ))
-        
-        if llm_data.get("causale_trasporto"):
-            fields.append(ExtractedFieldResult(
-                field_name="causale_trasporto",
-                raw_value=str(llm_data["causale_trasporto"]),
-                normalized_value=str(llm_data["causale_trasporto"]).strip(),
-                confidence=0.75,
-                evidence_text="LLM type-specific extraction"
-            ))
-        
-        # Fattura fields
-        if llm_data.get("imponibile"):
-            val = str(llm_data["imponibile"])
-            normalized = normalize_amount(val)
-            if normalized:
-                fields.append(ExtractedFieldResult(
-                    field_name="imponibile",
-                    raw_value=val,
-                    normalized_value=normalized,
-                    confidence=0.75,
-                    evidence_text="LLM type-specific extraction"
-                ))
-        
-        if llm_data.get("aliquota_iva"):
-            fields.append(ExtractedFieldResult(
-                field_name="aliquota_iva",
-                raw_value=str(llm_data["aliquota_iva"]),
-                normalized_value=str(llm_data["aliquota_iva"]),
-                confidence=0.75,
-                evidence_text="LLM type-specific extraction"
-            ))
-        
-        if llm_data.get("importo_iva"):
-            val = str(llm_data["importo_iva"])
-            normalized = normalize_amount(val)
-            if normalized:
-                fields.append(ExtractedFieldResult(
-                    field_name="importo_iva",
-                    raw_value=val,
-                    normalized_value=normalized,
-                    confidence=0.75,
-                    evidence_text="LLM type-specific extraction"
-                ))
-        
-        if llm_data.get("scadenza_pagamento"):
-            fields.append(ExtractedFieldResult(
-                field_name="scadenza_pagamento",
-                raw_value=str(llm_data["scadenza_pagamento"]),
-                normalized_value=str(llm_data["scadenza_pagamento"]).strip(),
-                confidence=0.75,
-                evidence_text="LLM type-specific extraction"
-            ))
-        
-        if llm_data.get("modalita_pagamento"):
-            fields.append(ExtractedFieldResult(
-                field_name="modalita_pagamento",
-                raw_value=str(llm_data["modalita_pagamento"]),
-                normalized_value=str(llm_data["modalita_pagamento"]).strip(),
-                confidence=0.75,
-                evidence_text="LLM type-specific extraction"
-            ))
-        
-        # Preventivo fields
-        if llm_data.get("validita_offerta"):
-            fields.append(ExtractedFieldResult(
-                field_name="validita_offerta",
-                raw_value=str(llm_data["validita_offerta"]),
-                normalized_value=str(llm_data["validita_offerta"]).strip(),
-                confidence=0.70,
-                evidence_text="LLM type-specific extraction"
-            ))
-        
-        # Ordine (PO) fields
-        if llm_data.get("data_consegna"):
+        # Process LLM results with validation, in spec order
+        for key, field_name, confidence, normalize, strip_raw, evidence, invalid_warning in _LLM_FIELD_SPECS:
+            value = llm_data.get(key)
+            if not value:
+                continue
+            raw = str(value).strip() if strip_raw else str(value)
+            normalized = normalize(raw)
+            if normalized is None:
+                if invalid_warning:
+                    warnings.append(invalid_warning.format(raw))
+                continue
             fields.append(ExtractedFieldResult(
-                field_name="data_consegna",
-                raw_value=str(llm_data["data_consegna"]),
-                normalized_value=str(llm_data["data_consegna"]).strip(),
-                confidence=0.75,
-                evidence_text="LLM type-specific extraction"
+                field_name=field_name,
+                raw_value=raw,
+                normalized_value=normalized,
+                confidence=confidence,
+                evidence_text=evidence
             ))
         
         # Line items
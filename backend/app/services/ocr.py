@@ -8,6 +8,7 @@ from io import BytesIO
 import httpx
 import re
 
+import fitz  # PyMuPDF
 import pytesseract
 from PIL import Image, ImageEnhance, ImageOps
 
@@ -117,8 +118,6 @@ def ocr_with_deepseek(image: Image.Image) -> str | None:
 
 def ocr_page(file_path: Path, page_number: int, dpi: int = 400) -> OCRPageResult:
     """Run OCR on a single page."""
-    import fitz  # PyMuPDF
-    
     try:
         # 1. Check for Native Text (smart mode)
         # Verify if page has extractable text directly
@@ -237,7 +236,6 @@ def run_ocr(file_path: str | Path, pages_to_ocr: list[int] | None = None) -> OCR
     file_path = Path(file_path)
     warnings = []
     
-    import fitz
     try:
         doc = fitz.open(file_path)
         total_pages = len(doc)
@@ -294,7 +292,6 @@ def run_ocr_with_rotations(file_path: str | Path, rotations: dict[int, int]) ->
     file_path = Path(file_path)
     warnings = []
     
-    import fitz
     try:
         doc = fitz.open(file_path)
         total_pages = len(doc)
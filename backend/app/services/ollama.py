@@ -0,0 +1,46 @@
+"""Shared async HTTP client for the Ollama API."""
+import asyncio
+
+import httpx
+
+from app.config import get_settings
+
+settings = get_settings()
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_sync_client: httpx.Client | None = None
+
+
+def get_ollama_client() -> httpx.AsyncClient:
+    """Lazily created keep-alive client for Ollama, pooled per event loop.
+
+    Celery tasks drive coroutines with run_until_complete on the worker's loop:
+    the client is reused across documents and rebuilt only if the loop changes.
+    Per-call timeouts are passed to the request.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            base_url=settings.ollama_base_url,
+            timeout=60,
+            limits=httpx.Limits(max_keepalive_connections=16),
+        )
+        _client_loop = loop
+    return _client
+
+
+def get_ollama_sync_client() -> httpx.Client:
+    """Lazily created keep-alive client for sync callers (RAG runs in the threadpool).
+
+    httpx.Client is thread-safe, so one instance serves every request thread.
+    """
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = httpx.Client(
+            base_url=settings.ollama_base_url,
+            timeout=60,
+            limits=httpx.Limits(max_keepalive_connections=16),
+        )
+    return _sync_client
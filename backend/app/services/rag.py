@@ -5,33 +5,91 @@ information that is ACTUALLY present in the documents.
 """
 import logging
 import re
+from datetime import datetime
 from uuid import UUID
 from typing import List, Dict, Any, Optional
 
 import httpx
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import false, func, or_, select, text
 
 from app.models.document import Document
 from app.models.extraction import ExtractedField
 from app.config import get_settings
+from app.services.ollama import get_ollama_sync_client
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Lines are embedded asynchronously after extraction: skip the embedding call until some are
+HAS_EMBEDDED_LINES_SQL = text("""
+    SELECT EXISTS (
+        SELECT 1
+        FROM document_lines l
+        JOIN documents d ON d.id = l.document_id
+        WHERE d.tenant_id = :tenant_id AND l.embedding IS NOT NULL
+    )
+""")
+
+# Two-stage ANN search: Hamming distance on binary codes, then cosine rerank
+SEMANTIC_SEARCH_SQL = text("""
+    WITH candidates AS (
+        SELECT l.document_id, l.description, l.embedding
+        FROM document_lines l
+        JOIN documents d ON d.id = l.document_id
+        WHERE d.tenant_id = :tenant_id AND l.embedding IS NOT NULL
+        ORDER BY binary_quantize(l.embedding)::bit(768)
+            <~> binary_quantize(CAST(:embedding AS halfvec(768)))::bit(768)
+        LIMIT 200
+    )
+    SELECT document_id, description, embedding <=> CAST(:embedding AS halfvec(768)) AS distance
+    FROM candidates
+    ORDER BY distance
+    LIMIT 10
+""")
+
 
 class RAGService:
-    """RAG service that searches documents and answers based on actual content."""
+    """RAG service that searches documents and answers based on actual content.
     
-    def __init__(self, db: Session, tenant_id: UUID):
-        self.db = db
-        self.tenant_id = tenant_id
+    Stateless: the session and tenant are passed per call, so one instance is shared.
+    """
     
-    def _search_documents(self, query: str) -> List[tuple[Document, float, str]]:
+    def _semantic_search(self, db: Session, tenant_id: UUID, query: str) -> Dict[UUID, str]:
         """
-        Search documents by text content and metadata.
-        Returns: List of (document, relevance_score, matched_snippet)
+        Find documents whose line items are semantically close to the query.
+        Returns: {document_id: best matching line description}
         """
+        try:
+            if not db.scalar(HAS_EMBEDDED_LINES_SQL, {"tenant_id": tenant_id}):
+                return {}
+            
+            response = get_ollama_sync_client().post(
+                "/api/embeddings",
+                json={"model": settings.ollama_embed_model, "prompt": query},
+                timeout=30
+            )
+            embedding = response.json().get("embedding") if response.status_code == 200 else None
+            if not embedding:
+                return {}
+            
+            db.execute(text("SET LOCAL hnsw.ef_search = 40"))
+            rows = db.execute(
+                SEMANTIC_SEARCH_SQL,
+                {"tenant_id": tenant_id, "embedding": str(embedding)}
+            ).all()
+        except Exception as e:
+            logger.warning(f"Semantic search unavailable: {e}")
+            db.rollback()
+            return {}
+        
+        matches = {}
+        for row in rows:
+            matches.setdefault(row.document_id, row.description or "")
+        return matches
+    
+    def _search_terms(self, query: str) -> List[str]:
+        """The lowercased query plus entity names found in it."""
         query_lower = query.lower()
         
         # Extract potential entity names for search
@@ -46,26 +104,75 @@ class RAGService:
         for pattern in entity_patterns:
             matches = re.findall(pattern, query_lower, re.IGNORECASE)
             search_terms.extend([m.strip().lower() for m in matches if m.strip()])
+        return search_terms
+    
+    def _candidate_filter(self, search_terms: List[str], semantic_ids: List[UUID]):
+        """
+        SQL filter for documents the scoring loop can give a positive score.
+        Returns: (candidate condition, full-text hit expression)
+        """
+        # Same terms the scoring loop looks for in raw_text
+        raw_terms = [t for t in search_terms if len(t) >= 3]
+        
+        # Full-text match on raw_text (GIN on raw_text_tsv): stemmed forms
+        if raw_terms:
+            ts_query = func.plainto_tsquery("italian", raw_terms[0])
+            for term in raw_terms[1:]:
+                ts_query = ts_query.op("||")(func.plainto_tsquery("italian", term))
+            fts_hit = Document.raw_text_tsv.op("@@")(ts_query)
+        else:
+            fts_hit = false()
         
-        # Get all documents
-        all_docs = self.db.query(Document).filter(
-            Document.tenant_id == self.tenant_id
+        # Candidates: full-text, raw_text substring, metadata, extracted field or semantic hits
+        field_value = func.lower(func.coalesce(
+            func.nullif(ExtractedField.normalized_value, ""), ExtractedField.raw_value, ""
+        ))
+        conditions = [
+            fts_hit,
+            Document.id.in_(
+                select(ExtractedField.document_id).where(
+                    or_(*[field_value.contains(t, autoescape=True) for t in search_terms])
+                )
+            ),
+        ]
+        # Literal substrings (partial codes, names inside longer tokens): trigram GIN on lower(raw_text)
+        conditions.extend(func.lower(Document.raw_text).contains(t, autoescape=True) for t in raw_terms)
+        for column in (Document.fornitore, Document.emittente, Document.doc_number):
+            conditions.extend(func.lower(column).contains(t, autoescape=True) for t in search_terms)
+        if semantic_ids:
+            conditions.append(Document.id.in_(semantic_ids))
+        return or_(*conditions), fts_hit
+    
+    def _search_documents(self, db: Session, tenant_id: UUID, query: str) -> List[tuple[Document, float, str]]:
+        """
+        Search documents by text content and metadata.
+        Returns: List of (document, relevance_score, matched_snippet)
+        """
+        search_terms = self._search_terms(query)
+        semantic_matches = self._semantic_search(db, tenant_id, query)
+        candidate_filter, fts_hit = self._candidate_filter(search_terms, list(semantic_matches))
+        
+        candidates = db.query(Document, fts_hit.label("fts_hit")).filter(
+            Document.tenant_id == tenant_id,
+            candidate_filter
         ).all()
         
         results = []
         
-        for doc in all_docs:
+        for doc, is_fts_hit in candidates:
             score = 0.0
             snippets = []
             
             # Search in raw text
             raw_text = (doc.raw_text or "").lower()
+            raw_hit = False
             
             for term in search_terms:
                 if len(term) < 3:
                     continue
                     
                 if term in raw_text:
+                    raw_hit = True
                     # Find snippet around the match
                     idx = raw_text.find(term)
                     start = max(0, idx - 50)
@@ -74,6 +181,10 @@ class RAGService:
                     snippets.append(f"...{snippet}...")
                     score += 3.0
             
+            # Stemmed match without a literal substring hit
+            if is_fts_hit and not raw_hit:
+                score += 3.0
+            
             # Search in metadata
             if doc.fornitore and any(t in doc.fornitore.lower() for t in search_terms):
                 score += 5.0
@@ -88,7 +199,7 @@ class RAGService:
                 snippets.append(f"Numero: {doc.doc_number}")
             
             # Search in extracted fields
-            fields = self.db.query(ExtractedField).filter(
+            fields = db.query(ExtractedField).filter(
                 ExtractedField.document_id == doc.id
             ).all()
             
@@ -99,6 +210,11 @@ class RAGService:
                         score += 2.0
                         snippets.append(f"{field.field_name}: {value}")
             
+            # Search in line items (embeddings)
+            if doc.id in semantic_matches:
+                score += 2.0
+                snippets.append(f"Riga: {semantic_matches[doc.id]}")
+            
             if score > 0:
                 results.append((doc, score, " | ".join(snippets[:3])))
         
@@ -173,7 +289,7 @@ Contenuto:
         
         return "\n".join(context_parts)
     
-    def query(self, question: str, history: List[Dict] = None) -> Dict[str, Any]:
+    def query(self, db: Session, tenant_id: UUID, question: str, history: List[Dict] = None) -> Dict[str, Any]:
         """
         Answer a question by searching documents first.
         
@@ -181,7 +297,7 @@ Contenuto:
         Does not hallucinate or return unrelated documents.
         """
         # First, search for relevant documents
-        search_results = self._search_documents(question)
+        search_results = self._search_documents(db, tenant_id, question)
         
         # Format context with only matching documents
         if search_results:
@@ -189,8 +305,8 @@ Contenuto:
             matched_docs = [r[0] for r in search_results]
         else:
             # If no matches, provide general overview
-            all_docs = self.db.query(Document).filter(
-                Document.tenant_id == self.tenant_id
+            all_docs = db.query(Document).filter(
+                Document.tenant_id == tenant_id
             ).all()
             
             context = "NESSUN DOCUMENTO trovato per la ricerca specifica.\n\nDocumenti disponibili:\n"
@@ -208,7 +324,6 @@ Contenuto:
                 history_text += f"{role}: {content}\n"
             history_text += "\n"
         
-        from datetime import datetime
         today_str = datetime.now().strftime('%d/%m/%Y')
 
         prompt = f"""Sei un assistente AI per l'analisi di documenti aziendali.
@@ -274,3 +389,7 @@ Rispondi in modo preciso e onesto. Se non trovi informazioni rilevanti, dillo ch
                 "answer": f"Errore: {str(e)}",
                 "citations": []
             }
+
+
+# Global instance
+rag_service = RAGService()
@@ -13,22 +13,18 @@ logger = logging.getLogger(__name__)
 class ReconciliationService:
     """Service for reconciling orders with deliveries (DDT/PO matching)."""
     
-    def __init__(self, db: Session, tenant_id: UUID):
-        self.db = db
-        self.tenant_id = tenant_id
-    
-    def _get_documents_by_type(self, doc_type: str) -> List[Document]:
+    def _get_documents_by_type(self, db: Session, tenant_id: UUID, doc_type: str) -> List[Document]:
         """Get all documents of a specific type."""
-        return self.db.query(Document).filter(
-            Document.tenant_id == self.tenant_id,
+        return db.query(Document).filter(
+            Document.tenant_id == tenant_id,
             Document.doc_type == doc_type
         ).all()
     
-    def _analyze_completeness(self) -> Dict[str, Any]:
+    def _analyze_completeness(self, db: Session, tenant_id: UUID) -> Dict[str, Any]:
         """Analyze if orders are complete based on DDT/PO matching."""
-        orders = self._get_documents_by_type("po")
-        ddts = self._get_documents_by_type("ddt")
-        invoices = self._get_documents_by_type("fattura")
+        orders = self._get_documents_by_type(db, tenant_id, "po")
+        ddts = self._get_documents_by_type(db, tenant_id, "ddt")
+        invoices = self._get_documents_by_type(db, tenant_id, "fattura")
         
         analysis = {
             "total_orders": len(orders),
@@ -49,9 +45,9 @@ class ReconciliationService:
         
         return analysis
     
-    def answer_query(self, question: str) -> Dict[str, Any]:
+    def answer_query(self, db: Session, tenant_id: UUID, question: str) -> Dict[str, Any]:
         """Answer a reconciliation-related question."""
-        analysis = self._analyze_completeness()
+        analysis = self._analyze_completeness(db, tenant_id)
         
         question_lower = question.lower()
         
@@ -133,3 +129,7 @@ Posso aiutarti a verificare:
             "answer": answer,
             "citations": citations
         }
+
+
+# Global instance
+reconciliation_service = ReconciliationService()
@@ -18,8 +18,25 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
-    task_track_started=True,
+    task_ignore_result=True,  # fire-and-forget: nothing reads task results
     task_time_limit=300,  # 5 minutes max per task
     worker_prefetch_multiplier=1,
     task_acks_late=True,
+    beat_schedule={
+        "refresh-reporting-view": {
+            "task": "app.workers.tasks.refresh_reporting_view",
+            "schedule": settings.reporting_refresh_minutes * 60,
+        },
+    },
 )
+
+# Task names for the web process: enqueue with send_task, without importing the task module
+PROCESS_DOCUMENT = "app.workers.tasks.process_document"
+PROCESS_DOCUMENT_AFTER_ROTATION = "app.workers.tasks.process_document_after_rotation"
+
+
+def enqueue(task_name: str, *document_ids, **task_kwargs) -> None:
+    """Queue one task per document id over a single pooled broker connection."""
+    with celery_app.producer_or_acquire() as producer:
+        for document_id in document_ids:
+            celery_app.send_task(task_name, args=[str(document_id)], kwargs=task_kwargs, producer=producer)
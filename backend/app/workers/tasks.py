@@ -1,24 +1,46 @@
 """Celery tasks for async document processing."""
+import asyncio
 import logging
 from datetime import datetime
 
+from sqlalchemy import text
+
+from app.config import get_settings
 from app.workers.celery_app import celery_app
 from app.database import SessionLocal
 from app.models.document import Document, DocumentPage, DocumentStatus
 from app.models.extraction import ExtractedField, DocumentLine
 from app.services.extraction import extract_text_from_pdf
-from app.services.ocr import run_ocr
+from app.services.ocr import run_ocr, run_ocr_with_rotations
 from app.services.classification import classify_document
 from app.services.metatag import extract_fields
+from app.services.ollama import get_ollama_client
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Page rows may survive a re-run (ingestion reprocess): refresh the text, keep the user's rotation
+PAGE_UPSERT = (["document_id", "page_number"], ["text_content", "ocr_confidence"])
+
+
+def _queue_embeddings(document_id, line_count: int) -> None:
+    """Queue embedding of the freshly inserted lines for RAG semantic search."""
+    if not line_count:
+        return
+    try:
+        generate_embeddings.delay(str(document_id))
+    except Exception as e:
+        # Extraction is already committed: a missing embedding only costs semantic recall
+        logger.warning(f"Could not queue embeddings for {document_id}: {e}")
 
 
 @celery_app.task(bind=True, max_retries=3)
-def process_document(self, document_id: str):
+def process_document(self, document_id: str, force: bool = False):
     """
     Main document processing pipeline.
     
+    force: user-requested reprocess, ask the LLM again instead of reusing its cached answer.
+    
     Steps:
     1. Extract text (native PDF)
     2. If scanned, run OCR
@@ -46,16 +68,20 @@ def process_document(self, document_id: str):
         
         doc.is_scanned = extraction.is_scanned
         doc.raw_text = extraction.raw_text
+        if extraction.total_pages:
+            doc.page_count = extraction.total_pages
         doc.warnings = extraction.warnings
         
-        # Save pages
-        for page in extraction.pages:
-            db_page = DocumentPage(
-                document_id=doc.id,
-                page_number=page.page_number,
-                text_content=page.text
-            )
-            db.add(db_page)
+        # Page rows, inserted in one batch once OCR results are merged in
+        page_rows = {
+            page.page_number: {
+                "document_id": doc.id,
+                "page_number": page.page_number,
+                "text_content": page.text,
+                "ocr_confidence": None,
+            }
+            for page in extraction.pages
+        }
         
         # Step 2: OCR if needed
         if extraction.is_scanned:
@@ -74,14 +100,10 @@ def process_document(self, document_id: str):
                 
                 # Still save pages for preview
                 for ocr_page in ocr_result.pages:
-                    db_page = db.query(DocumentPage).filter(
-                        DocumentPage.document_id == doc.id,
-                        DocumentPage.page_number == ocr_page.page_number
-                    ).first()
-                    
-                    if db_page:
-                        db_page.ocr_confidence = ocr_page.confidence
+                    if ocr_page.page_number in page_rows:
+                        page_rows[ocr_page.page_number]["ocr_confidence"] = ocr_page.confidence
                 
+                DocumentPage.bulk_upsert(db, page_rows.values(), *PAGE_UPSERT)
                 db.commit()
                 
                 return {
@@ -93,22 +115,17 @@ def process_document(self, document_id: str):
             
             # Update page text with OCR results
             for ocr_page in ocr_result.pages:
-                db_page = db.query(DocumentPage).filter(
-                    DocumentPage.document_id == doc.id,
-                    DocumentPage.page_number == ocr_page.page_number
-                ).first()
-                
-                if db_page:
-                    db_page.text_content = ocr_page.text
-                    db_page.ocr_confidence = ocr_page.confidence
+                if ocr_page.page_number in page_rows:
+                    page_rows[ocr_page.page_number]["text_content"] = ocr_page.text
+                    page_rows[ocr_page.page_number]["ocr_confidence"] = ocr_page.confidence
             
             # Update raw_text with OCR
             doc.raw_text = "\n\n".join(p.text for p in ocr_result.pages)
         
+        DocumentPage.bulk_upsert(db, page_rows.values(), *PAGE_UPSERT)
         db.commit()
         
         # Step 3: Classify document (with filename for hints)
-        import asyncio
         classification = asyncio.get_event_loop().run_until_complete(
             classify_document(doc.raw_text or "", filename=doc.filename)
         )
@@ -122,7 +139,7 @@ def process_document(self, document_id: str):
         page_texts = [p.text for p in extraction.pages]
         doc_type_str = doc.doc_type if doc.doc_type else "unknown"
         field_result = asyncio.get_event_loop().run_until_complete(
-            extract_fields(doc.raw_text or "", page_texts, doc_type=doc_type_str)
+            extract_fields(doc.raw_text or "", page_texts, doc_type=doc_type_str, use_cache=not force)
         )
         
         # Clear old extracted fields and lines to prevent duplicates on reprocess
@@ -195,18 +212,19 @@ def process_document(self, document_id: str):
                 except (ValueError, TypeError):
                     pass
         
-        for line in field_result.lines:
-            db_line = DocumentLine(
-                document_id=doc.id,
-                line_number=line["line_number"],
-                item_code=line.get("item_code"),
-                description=line.get("description"),
-                quantity=line.get("quantity"),
-                unit=line.get("unit"),
-                unit_price=line.get("unit_price"),
-                confidence=line.get("confidence", 0.5)
-            )
-            db.add(db_line)
+        DocumentLine.bulk_insert(db, (
+            {
+                "document_id": doc.id,
+                "line_number": line["line_number"],
+                "item_code": line.get("item_code"),
+                "description": line.get("description"),
+                "quantity": line.get("quantity"),
+                "unit": line.get("unit"),
+                "unit_price": line.get("unit_price"),
+                "confidence": line.get("confidence", 0.5),
+            }
+            for line in field_result.lines
+        ))
         
         doc.warnings = doc.warnings + field_result.warnings
         
@@ -215,6 +233,7 @@ def process_document(self, document_id: str):
         doc.processed_at = datetime.utcnow()
         
         db.commit()
+        _queue_embeddings(doc.id, len(field_result.lines))
         
         logger.info(f"Successfully processed document: {doc.filename}")
         
@@ -245,12 +264,6 @@ def process_document(self, document_id: str):
 @celery_app.task
 def generate_embeddings(document_id: str):
     """Generate embeddings for document lines (for RAG)."""
-    import asyncio
-    import httpx
-    
-    from app.config import get_settings
-    settings = get_settings()
-    
     db = SessionLocal()
     
     try:
@@ -262,16 +275,16 @@ def generate_embeddings(document_id: str):
         async def embed_line(line: DocumentLine):
             text = f"{line.item_code or ''} {line.description or ''}"
             
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(
-                    f"{settings.ollama_base_url}/api/embeddings",
-                    json={"model": settings.ollama_embed_model, "prompt": text}
-                )
-                
-                if response.status_code == 200:
-                    embedding = response.json().get("embedding")
-                    if embedding:
-                        line.embedding = embedding
+            response = await get_ollama_client().post(
+                "/api/embeddings",
+                json={"model": settings.ollama_embed_model, "prompt": text},
+                timeout=30
+            )
+            
+            if response.status_code == 200:
+                embedding = response.json().get("embedding")
+                if embedding:
+                    line.embedding = embedding
         
         loop = asyncio.get_event_loop()
         for line in lines:
@@ -285,6 +298,19 @@ def generate_embeddings(document_id: str):
         db.close()
 
 
+@celery_app.task
+def refresh_reporting_view():
+    """Refresh the BI materialized view without blocking readers."""
+    db = SessionLocal()
+    
+    try:
+        db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_reporting_documents"))
+        db.commit()
+        return {"status": "success"}
+    finally:
+        db.close()
+
+
 @celery_app.task(bind=True, max_retries=2)
 def process_document_after_rotation(self, document_id: str):
     """
@@ -293,8 +319,6 @@ def process_document_after_rotation(self, document_id: str):
     This task runs OCR with the user-specified rotation angles applied,
     then continues with classification and extraction.
     """
-    from app.services.ocr import run_ocr_with_rotations
-    
     db = SessionLocal()
     doc = None
     
@@ -322,11 +346,9 @@ def process_document_after_rotation(self, document_id: str):
         doc.warnings = doc.warnings + ocr_result.warnings
         
         # Update page text with OCR results
+        pages_by_number = {p.page_number: p for p in pages_with_rotation}
         for ocr_page in ocr_result.pages:
-            db_page = db.query(DocumentPage).filter(
-                DocumentPage.document_id == doc.id,
-                DocumentPage.page_number == ocr_page.page_number
-            ).first()
+            db_page = pages_by_number.get(ocr_page.page_number)
             
             if db_page:
                 db_page.text_content = ocr_page.text
@@ -337,7 +359,6 @@ def process_document_after_rotation(self, document_id: str):
         db.commit()
         
         # Classify document
-        import asyncio
         classification = asyncio.get_event_loop().run_until_complete(
             classify_document(doc.raw_text or "", filename=doc.filename)
         )
@@ -386,24 +407,26 @@ def process_document_after_rotation(self, document_id: str):
                 except (ValueError, TypeError):
                     pass
         
-        for line in field_result.lines:
-            db_line = DocumentLine(
-                document_id=doc.id,
-                line_number=line["line_number"],
-                item_code=line.get("item_code"),
-                description=line.get("description"),
-                quantity=line.get("quantity"),
-                unit=line.get("unit"),
-                unit_price=line.get("unit_price"),
-                confidence=line.get("confidence", 0.5)
-            )
-            db.add(db_line)
+        DocumentLine.bulk_insert(db, (
+            {
+                "document_id": doc.id,
+                "line_number": line["line_number"],
+                "item_code": line.get("item_code"),
+                "description": line.get("description"),
+                "quantity": line.get("quantity"),
+                "unit": line.get("unit"),
+                "unit_price": line.get("unit_price"),
+                "confidence": line.get("confidence", 0.5),
+            }
+            for line in field_result.lines
+        ))
         
         doc.warnings = doc.warnings + field_result.warnings
         doc.status = DocumentStatus.EXTRACTED
         doc.processed_at = datetime.utcnow()
         
         db.commit()
+        _queue_embeddings(doc.id, len(field_result.lines))
         
         logger.info(f"Successfully processed document after rotation: {doc.filename}")
         
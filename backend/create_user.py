@@ -43,7 +43,7 @@ def create_user():
                 tenant_id=tenant.id,
                 role=UserRole.ADMIN,
                 full_name="Admin User",
-                is_active="Y"
+                is_active=True
             )
             db.add(user)
             db.commit()
@@ -51,7 +51,7 @@ def create_user():
         else:
             print("User already exists, updating password...")
             user.hashed_password = get_password_hash("admin")
-            user.is_active = "Y"
+            user.is_active = True
             db.commit()
             print("User updated")
             
@@ -44,7 +44,7 @@ def seed_database():
                 hashed_password=get_password_hash("admin"),
                 full_name="Administrator",
                 role="admin",
-                is_active="Y"
+                is_active=True
             )
             db.add(admin)
             db.commit()
@@ -66,7 +66,7 @@ def seed_database():
                 hashed_password=get_password_hash("user"),
                 full_name="Operatore Demo",
                 role="operatore",
-                is_active="Y"
+                is_active=True
             )
             db.add(operatore)
             db.commit()
@@ -85,7 +85,7 @@ def seed_database():
                 hashed_password=get_password_hash("manager123"),
                 full_name="Manager Demo",
                 role="manager",
-                is_active="Y"
+                is_active=True
             )
             db.add(manager)
             db.commit()
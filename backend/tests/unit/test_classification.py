@@ -51,6 +51,15 @@ class TestClassification:
         
         assert result is None
     
+    def test_find_keywords_overlapping(self):
+        """Test that keywords nested in a longer match are still found."""
+        from app.services.classification import find_keywords
+        
+        found = find_keywords("fattura elettronica - ns. offerta commerciale")
+        
+        assert {"fattura", "fattura elettronica", "offerta", "offerta commerciale", "ns. offerta"} <= found
+        assert "ordine" not in found
+    
     def test_classification_result_dataclass(self):
         """Test ClassificationResult dataclass."""
         from app.services.classification import ClassificationResult
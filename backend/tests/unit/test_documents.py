@@ -0,0 +1,77 @@
+"""Tests for document router helpers."""
+import pytest
+from starlette.requests import Request
+
+
+def make_request(headers: dict[str, str] | None = None) -> Request:
+    """Bare GET request with the given headers."""
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+class TestAccelRedirect:
+    """Test X-Accel-Redirect path selection."""
+    
+    @pytest.fixture
+    def accel_settings(self, monkeypatch):
+        from app.config import Settings
+        from app.routers import documents
+        
+        monkeypatch.setattr(documents, "settings", Settings(
+            upload_dir="/app/uploads", accel_redirect_prefix="/_uploads/"
+        ))
+    
+    def test_proxied_request(self, accel_settings):
+        """Test internal URI for a file under upload_dir, behind Nginx."""
+        from app.routers.documents import _accel_redirect_path
+        
+        request = make_request({"X-Accel-Allowed": "1"})
+        path = _accel_redirect_path(request, "/app/uploads/tenant/file name.pdf")
+        
+        assert path == "/_uploads/tenant/file%20name.pdf"
+    
+    def test_direct_request(self, accel_settings):
+        """Test that requests not coming through Nginx get the file body."""
+        from app.routers.documents import _accel_redirect_path
+        
+        assert _accel_redirect_path(make_request(), "/app/uploads/tenant/a.pdf") is None
+    
+    def test_outside_upload_dir(self, accel_settings):
+        """Test files outside upload_dir are never handed to Nginx."""
+        from app.routers.documents import _accel_redirect_path
+        
+        request = make_request({"X-Accel-Allowed": "1"})
+        assert _accel_redirect_path(request, "/etc/passwd") is None
+    
+    def test_not_configured(self):
+        """Test default settings serve files from Python."""
+        from app.routers.documents import _accel_redirect_path
+        
+        request = make_request({"X-Accel-Allowed": "1"})
+        assert _accel_redirect_path(request, "/app/uploads/tenant/a.pdf") is None
+
+
+class TestEtagMatches:
+    """Test If-None-Match handling."""
+    
+    ETAG = '"abc123"'
+    
+    @pytest.mark.parametrize("header", ['"abc123"', 'W/"abc123"', '"old", "abc123"', "*"])
+    def test_match(self, header):
+        """Test exact, weak, listed and wildcard matches."""
+        from app.routers.documents import _etag_matches
+        
+        assert _etag_matches(make_request({"If-None-Match": header}), self.ETAG)
+    
+    @pytest.mark.parametrize("header", ['"old"', "abc123", ""])
+    def test_no_match(self, header):
+        """Test other tags, unquoted tags and an empty header."""
+        from app.routers.documents import _etag_matches
+        
+        assert not _etag_matches(make_request({"If-None-Match": header}), self.ETAG)
+    
+    def test_no_header(self):
+        """Test a request without If-None-Match."""
+        from app.routers.documents import _etag_matches
+        
+        assert not _etag_matches(make_request(), self.ETAG)
@@ -75,3 +75,130 @@ class TestMetatagExtraction:
         assert len(output.fields) == 1
         assert output.fields[0].field_name == "test"
         assert len(output.warnings) == 1
+
+
+class TestLLMFieldSpecs:
+    """Test mapping of the LLM answer onto extracted fields."""
+
+    @pytest.fixture
+    def llm_answer(self, monkeypatch):
+        from app.services import metatag
+
+        def set_answer(data):
+            async def fake_llm(text, doc_type):
+                return data
+            monkeypatch.setattr(metatag, "extract_with_llm_semantic", fake_llm)
+        return set_answer
+
+    @pytest.mark.asyncio
+    async def test_semantic_fields(self, llm_answer):
+        """Test fields, confidences and evidence in spec order."""
+        from app.services.metatag import extract_fields
+
+        llm_answer({
+            "numero_documento": "FT-123",
+            "data_documento": "15/03/2024",
+            "emittente": "  acme srl ",
+            "destinatario": " beta spa",
+            "totale": "1.234,56",
+            "vettore": " BRT ",
+        })
+        output = await extract_fields("testo", doc_type="ddt", use_cache=False)
+
+        assert [(f.field_name, f.raw_value, f.normalized_value, f.confidence, f.evidence_text)
+                for f in output.fields] == [
+            ("numero_documento", "FT-123", "FT-123", 0.85, "LLM semantic extraction"),
+            ("data_documento", "15/03/2024", "2024-03-15", 0.85, "LLM semantic extraction"),
+            ("emittente", "acme srl", "Acme Srl", 0.85, "LLM semantic extraction"),
+            ("fornitore", "beta spa", "Beta Spa", 0.75, "LLM semantic extraction"),
+            ("totale", "1.234,56", "1234.56", 0.8, "LLM semantic extraction"),
+            ("vettore", " BRT ", "BRT", 0.75, "LLM type-specific extraction"),
+        ]
+        assert output.warnings == ["Nessuna riga articolo rilevata"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_values_dropped(self, llm_answer):
+        """Test the invalid-number warning and discarded short company names."""
+        from app.services.metatag import extract_fields
+
+        llm_answer({"numero_documento": "Via Roma", "emittente": " ab "})
+        output = await extract_fields("testo", use_cache=False)
+
+        assert output.fields == []
+        assert "Numero documento 'Via Roma' non valido (deve contenere cifre)" in output.warnings
+
+
+
+class TestLLMCache:
+    """Test memoization of LLM answers."""
+
+    @pytest.fixture
+    def llm_calls(self, monkeypatch):
+        from cachetools import LRUCache
+        from app.services import metatag
+
+        calls = []
+
+        async def fake_llm(text, doc_type):
+            calls.append(text)
+            return {"emittente": f"acme {len(calls)}", "righe_articolo": []}
+        monkeypatch.setattr(metatag, "extract_with_llm_semantic", fake_llm)
+        monkeypatch.setattr(metatag, "_llm_cache", LRUCache(maxsize=8))
+        return calls
+
+    @pytest.mark.asyncio
+    async def test_hit_returns_copy(self, llm_calls):
+        """Test a cache hit skips the LLM and callers cannot mutate the cached answer."""
+        from app.services.metatag import extract_with_llm_cached
+
+        first = await extract_with_llm_cached("testo", "ddt")
+        first["righe_articolo"].append({"codice": "X"})
+        second = await extract_with_llm_cached("testo", "ddt")
+
+        assert len(llm_calls) == 1
+        assert second == {"emittente": "acme 1", "righe_articolo": []}
+
+    @pytest.mark.asyncio
+    async def test_reprocess_refreshes(self, llm_calls):
+        """Test use_cache=False asks the LLM again and replaces the cached answer."""
+        from app.services.metatag import extract_fields, extract_with_llm_cached
+
+        await extract_fields("testo", doc_type="ddt")
+        output = await extract_fields("testo", doc_type="ddt", use_cache=False)
+
+        assert len(llm_calls) == 2
+        assert output.fields[0].normalized_value == "Acme 2"
+        assert (await extract_with_llm_cached("testo", "ddt"))["emittente"] == "acme 2"
+
+
+class TestNormalizeDate:
+    """Test date normalization fast path and fallback."""
+
+    def test_day_first_formats(self):
+        """Test the separator-guessed formats."""
+        from app.services.metatag import normalize_date
+
+        assert normalize_date("01/02/2024") == "2024-02-01"
+        assert normalize_date("31.12.2023") == "2023-12-31"
+        assert normalize_date(" 05-06-2024 ") == "2024-06-05"
+
+    def test_two_digit_year(self):
+        """Test short years are read as %y, not as year 0024."""
+        from app.services.metatag import normalize_date
+
+        assert normalize_date("1/2/24") == "2024-02-01"
+        assert normalize_date("31.12.99") == "1999-12-31"
+
+    def test_iso_passthrough(self):
+        """Test ISO dates are returned unchanged."""
+        from app.services.metatag import normalize_date
+
+        assert normalize_date("2024-01-02") == "2024-01-02"
+
+    def test_invalid_returned_unchanged(self):
+        """Test unparseable input is returned as given."""
+        from app.services.metatag import normalize_date
+
+        assert normalize_date("31/02/2024") == "31/02/2024"
+        assert normalize_date("domani") == "domani"
+        assert normalize_date("") is None
@@ -0,0 +1,37 @@
+"""Tests for keyset pagination tokens."""
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+
+class TestCursor:
+    """Test page token encoding."""
+    
+    def test_round_trip(self):
+        """Test decode_cursor inverts encode_cursor."""
+        from app.pagination import decode_cursor, encode_cursor
+        
+        created_at = datetime(2024, 3, 15, 10, 30, 0, 123456, tzinfo=timezone.utc)
+        row_id = uuid4()
+        
+        assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, row_id)
+    
+    def test_token_is_url_safe(self):
+        """Test the token can go in a query string unescaped."""
+        from app.pagination import encode_cursor
+        
+        token = encode_cursor(datetime.now(timezone.utc), uuid4())
+        
+        assert not set(token) & set("+/ ")
+    
+    @pytest.mark.parametrize("token", ["", "not-base64!", "aGVsbG8=", "MjAyNHxub3QtYS11dWlk"])
+    def test_invalid_token(self, token):
+        """Test malformed tokens are a 400, not a 500."""
+        from app.pagination import decode_cursor
+        
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor(token)
+        
+        assert exc_info.value.status_code == 400
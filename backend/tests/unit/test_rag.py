@@ -0,0 +1,47 @@
+"""Tests for RAG candidate selection."""
+import pytest
+from sqlalchemy.dialects import postgresql
+
+
+class TestCandidateFilter:
+    """Test which queries make a document a candidate."""
+    
+    @pytest.fixture
+    def rag(self):
+        import app.models  # noqa: F401
+        import app.models.chat  # noqa: F401
+        from app.services.rag import RAGService
+        
+        return RAGService()
+    
+    def compile_filter(self, rag, query):
+        condition, _ = rag._candidate_filter(rag._search_terms(query), [])
+        compiled = condition.compile(dialect=postgresql.dialect())
+        return str(compiled), set(compiled.params.values())
+    
+    def test_search_terms(self, rag):
+        """Test the query is kept whole, with entity names added."""
+        assert rag._search_terms("Fatture di Rossi") == ["fatture di rossi", "rossi"]
+        assert rag._search_terms("ordini Acme Srl") == ["ordini acme srl", "acme srl"]
+    
+    def test_raw_text_substring(self, rag):
+        """Test every term of 3+ chars is matched as a raw_text substring, not only stemmed."""
+        sql, params = self.compile_filter(rag, "fatture di rossi")
+        
+        assert sql.count("lower(documents.raw_text) LIKE") == 2
+        assert "raw_text_tsv @@" in sql
+        assert {"fatture di rossi", "rossi"} <= params
+    
+    def test_partial_code(self, rag):
+        """Test a partial article code still reaches raw_text."""
+        sql, params = self.compile_filter(rag, "AB12")
+        
+        assert "lower(documents.raw_text) LIKE" in sql
+        assert "ab12" in params
+    
+    def test_short_query(self, rag):
+        """Test short terms only match metadata and extracted fields."""
+        sql, _ = self.compile_filter(rag, "ab")
+        
+        assert "documents.raw_text" not in sql
+        assert "lower(documents.fornitore) LIKE" in sql
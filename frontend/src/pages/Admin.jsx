@@ -126,8 +126,8 @@ export default function Admin() {
                                         </span>
                                     </td>
                                     <td>
-                                        <span className={`badge badge-${user.is_active === 'Y' ? 'success' : 'error'}`}>
-                                            {user.is_active === 'Y' ? 'Attivo' : 'Disattivato'}
+                                        <span className={`badge badge-${user.is_active ? 'success' : 'error'}`}>
+                                            {user.is_active ? 'Attivo' : 'Disattivato'}
                                         </span>
                                     </td>
                                     <td>
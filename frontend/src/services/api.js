@@ -74,8 +74,17 @@ export const chatApi = {
     sendMessage: (message, sessionId) => api.post('/chat', { message, session_id: sessionId }),
     // Get list of previous sessions
     getSessions: () => api.get('/chat/sessions'),
-    // Get history of a specific session
-    getHistory: (sessionId) => api.get(`/chat/sessions/${sessionId}`),
+    // Get history of a specific session (follows page tokens until the end)
+    getHistory: async (sessionId) => {
+        const messages = [];
+        let after;
+        do {
+            const res = await api.get(`/chat/sessions/${sessionId}`, { params: { after, limit: 200 } });
+            messages.push(...res.data);
+            after = res.headers['x-next-cursor'];
+        } while (after);
+        return { data: messages };
+    },
 };
 
 export const dashboardApi = {